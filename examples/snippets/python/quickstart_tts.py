@@ -1,6 +1,6 @@
 from dotenv import load_dotenv
 from elevenlabs.client import ElevenLabs
-from elevenlabs import play
+from elevenlabs.play import play
 import os
 
 load_dotenv()
@@ -0,0 +1,73 @@
+from dotenv import load_dotenv
+from elevenlabs.client import AsyncElevenLabs
+import asyncio
+import math
+import os
+import time
+
+load_dotenv()
+
+# Set ELEVENLABS_BASE_URL to try this against a local stand-in server
+elevenlabs = AsyncElevenLabs(
+  api_key=os.getenv("ELEVENLABS_API_KEY"),
+  base_url=os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io"),
+)
+
+texts = [
+    "The first move is what sets everything in motion.",
+    "Every great journey begins with a single step.",
+    "Listen closely, and the story will tell itself.",
+    "Good voices carry further than loud ones.",
+    "The quiet before the music is part of the song.",
+    "Slow down, the best ideas need room to breathe.",
+    "Tomorrow is built from what we say today.",
+    "Every word you choose shapes how you are heard.",
+]
+
+# At most this many requests are in flight at once
+concurrency = int(os.getenv("TTS_CONCURRENCY", "4"))
+
+
+async def synthesize(index: int, text: str, limit: asyncio.Semaphore):
+    async with limit:
+        started = time.perf_counter()
+        first_byte = None
+        size = 0
+        with open(f"speech_{index}.mp3", "wb") as f:
+            async for chunk in elevenlabs.text_to_speech.stream(
+                text=text,
+                voice_id="JBFqnCBsd6RMkjVDRZzb",
+                model_id="eleven_multilingual_v2",
+                output_format="mp3_44100_128",
+            ):
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+                # Each chunk can be played or forwarded as soon as it arrives
+                f.write(chunk)
+                size += len(chunk)
+        latency = time.perf_counter() - started
+        return first_byte or latency, latency, size / latency
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+async def main():
+    limit = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(synthesize(i, text, limit) for i, text in enumerate(texts)))
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(texts)} requests, {concurrency} at a time, in {elapsed:.2f}s")
+    for label, values, scale, unit in (
+        ("Time to first byte", [r[0] for r in results], 1000, "ms"),
+        ("Total latency", [r[1] for r in results], 1000, "ms"),
+        ("Throughput", [r[2] for r in results], 1 / 1024, "KiB/s"),
+    ):
+        summary = "  ".join(f"p{p} {percentile(values, p) * scale:.0f} {unit}" for p in (50, 90, 99))
+        print(f"{label}: {summary}")
+
+
+asyncio.run(main())
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for the OpenAPI Detailed Field-Level Diff
+
+This script times the stages of scripts/openapi-detailed-diff.py against
+synthetic OpenAPI documents of increasing size and against the real
+fern/apis/api/openapi.json, and records peak memory for each stage.
+
+Synthetic documents share component schemas heavily through `$ref`, nest
+them with `allOf`/`oneOf`, and include a few reference cycles. Each one is
+diffed against a mutated copy so compare and formatting have work to do.
+
+Usage:
+    python3 scripts/benchmark-openapi-diff.py [--sizes 100,1000,10000] [--repeat N]
+                                              [--output-file FILE] [--baseline FILE]
+
+Examples:
+    python3 scripts/benchmark-openapi-diff.py
+    python3 scripts/benchmark-openapi-diff.py --sizes 100,1000 --output-file benchmark.json
+    python3 scripts/benchmark-openapi-diff.py --baseline benchmark.json --max-regression 0.25
+"""
+
+import argparse
+import copy
+import gc
+import importlib.util
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+REAL_SPEC_PATH = REPO_ROOT / "fern" / "apis" / "api" / "openapi.json"
+STAGES = ["get_endpoint_schemas", "compare_endpoints", "format_changes_markdown"]
+
+
+def load_differ_module():
+    """Import scripts/openapi-detailed-diff.py, whose file name is not a valid module name."""
+    module_name = "openapi_detailed_diff"
+    spec = importlib.util.spec_from_file_location(module_name, Path(__file__).parent / "openapi-detailed-diff.py")
+    module = importlib.util.module_from_spec(spec)
+    # Registered so FieldRecord instances can be pickled by the differ's caches and pools
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def generate_spec(num_paths: int, seed: int = 0, levels: int = 5, nesting_depth: int = 4) -> Dict:
+    """Generate a synthetic OpenAPI document with heavy `$ref` sharing.
+
+    There is one component schema per five paths, split into `levels`
+    layers. Each schema has a few scalar properties, an enum, and up to two
+    references to schemas in the next layer, either directly, as array
+    items, or wrapped in `allOf`/`oneOf` up to `nesting_depth` levels deep.
+    Layering keeps the flattened size bounded like a real API, and every
+    50th schema in the last layer points back at the first layer to form a
+    reference cycle.
+    """
+    rng = random.Random(seed)
+    num_schemas = max(num_paths // 5, levels * 2)
+    schema_names = [f"Model{i}" for i in range(num_schemas)]
+    layers: List[List[int]] = [[] for _ in range(levels)]
+    for i in range(num_schemas):
+        layers[i * levels // num_schemas].append(i)
+
+    def ref(index: int) -> Dict:
+        return {"$ref": f"#/components/schemas/{schema_names[index]}"}
+
+    def nested(index: int, depth: int) -> Dict:
+        if depth == 0:
+            return ref(index)
+        combinator = rng.choice(["allOf", "oneOf"])
+        return {combinator: [nested(index, depth - 1), {"type": "null"}] if combinator == "oneOf"
+                else [nested(index, depth - 1)]}
+
+    schemas = {}
+    for level, layer in enumerate(layers):
+        for i in layer:
+            name = schema_names[i]
+            properties: Dict[str, Any] = {
+                "id": {"type": "string", "description": f"Identifier of {name}"},
+                "count": {"type": "integer", "minimum": 0, "maximum": rng.randint(10, 1000)},
+                "status": {"type": "string", "enum": [f"state_{n}" for n in range(rng.randint(3, 30))]},
+                "label": {"type": "string", "nullable": True, "default": "none"},
+            }
+            if level + 1 < levels:
+                for k in range(rng.randint(1, 2)):
+                    target = rng.choice(layers[level + 1])
+                    shape = rng.choice(["ref", "array", "nested"])
+                    if shape == "ref":
+                        properties[f"child_{k}"] = ref(target)
+                    elif shape == "array":
+                        properties[f"children_{k}"] = {"type": "array", "items": ref(target)}
+                    else:
+                        properties[f"nested_{k}"] = nested(target, rng.randint(1, nesting_depth))
+            elif i % 50 == 0:
+                properties["parent"] = ref(rng.choice(layers[0]))
+            schemas[name] = {
+                "type": "object",
+                "properties": properties,
+                "required": ["id", "status"],
+            }
+
+    paths = {}
+    for i in range(num_paths):
+        path = f"/v1/resource_{i}/{{item_id}}"
+        body_schema = rng.randrange(num_schemas)
+        response_schema = rng.randrange(num_schemas)
+        paths[path] = {
+            "get": {
+                "operationId": f"get_resource_{i}",
+                "summary": f"Get resource {i}",
+                "parameters": [
+                    {"name": "item_id", "in": "path", "required": True, "schema": {"type": "string"}},
+                    {"name": "page_size", "in": "query", "required": False, "schema": {"type": "integer"}},
+                ],
+                "responses": {
+                    "200": {"description": "OK", "content": {"application/json": {"schema": ref(response_schema)}}},
+                },
+            },
+            "post": {
+                "operationId": f"update_resource_{i}",
+                "summary": f"Update resource {i}",
+                "requestBody": {"content": {"application/json": {"schema": nested(body_schema, 2)}}},
+                "responses": {
+                    "200": {"description": "OK", "content": {"application/json": {"schema": ref(response_schema)}}},
+                    "422": {"description": "Validation Error", "content": {"application/json": {"schema": ref(0)}}},
+                },
+            },
+        }
+
+    return {
+        "openapi": "3.1.0",
+        "info": {"title": f"Synthetic API ({num_paths} paths)", "version": "1.0.0"},
+        "paths": paths,
+        "components": {"schemas": schemas},
+    }
+
+
+def mutate_spec(spec: Dict, seed: int = 1, fraction: float = 0.01) -> Dict:
+    """Return a copy of a spec with a small fraction of schemas and paths changed."""
+    rng = random.Random(seed)
+    mutated = copy.deepcopy(spec)
+    schemas = mutated.get("components", {}).get("schemas", {})
+
+    for name in rng.sample(sorted(schemas), max(1, int(len(schemas) * fraction))):
+        properties = schemas[name].setdefault("properties", {})
+        properties["benchmark_added"] = {"type": "string"}
+        for prop in properties.values():
+            if isinstance(prop.get("enum"), list) and len(prop["enum"]) > 1:
+                prop["enum"] = prop["enum"][:-1]
+                break
+
+    paths = mutated.get("paths", {})
+    for path in rng.sample(sorted(paths), max(1, int(len(paths) * fraction))):
+        del paths[path]
+    paths["/v1/benchmark/added"] = {
+        "get": {"operationId": "benchmark_added", "summary": "Added by the benchmark", "responses": {}}
+    }
+    return mutated
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Tuple[Any, float, int]:
+    """Run a stage, returning its result, best wall time and peak traced memory.
+
+    Timing runs happen without tracemalloc, which would otherwise dominate
+    the measurement; one extra traced run records peak memory.
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, best, peak
+
+
+def benchmark_case(differ_module, name: str, old_spec: Dict, new_spec: Dict, repeat: int) -> Dict:
+    """Time each diff stage for one pair of specs."""
+    differ_class = differ_module.OpenAPIFieldDiff
+
+    def flatten() -> Tuple[Dict, Dict]:
+        differ = differ_class()
+        return differ.get_endpoint_schemas(old_spec), differ.get_endpoint_schemas(new_spec)
+
+    (old_index, new_index), flatten_time, flatten_peak = measure(flatten, repeat)
+    comparison, compare_time, compare_peak = measure(
+        lambda: differ_class().compare_endpoint_indexes(old_index, new_index), repeat
+    )
+    markdown, format_time, format_peak = measure(
+        lambda: differ_class().format_changes_markdown(comparison), repeat
+    )
+
+    return {
+        "case": name,
+        "paths": len(old_spec.get("paths", {})),
+        "schemas": len(old_spec.get("components", {}).get("schemas", {})),
+        "fields": sum(
+            len(fields)
+            for endpoint in old_index.values()
+            for fields in list(endpoint["request_body"].values())
+            + [f for media in endpoint["responses"].values() for f in media.values()]
+        ),
+        "modified_endpoints": len(comparison["modified_endpoints"]),
+        "markdown_bytes": len(markdown.encode()),
+        "stages": {
+            "get_endpoint_schemas": {"seconds": flatten_time, "peak_bytes": flatten_peak},
+            "compare_endpoints": {"seconds": compare_time, "peak_bytes": compare_peak},
+            "format_changes_markdown": {"seconds": format_time, "peak_bytes": format_peak},
+        },
+    }
+
+
+def find_regressions(results: List[Dict], baseline: List[Dict], max_regression: float) -> List[str]:
+    """List stages that got slower or hungrier than the baseline by more than max_regression."""
+    baseline_cases = {case["case"]: case for case in baseline}
+    regressions = []
+    for case in results:
+        previous = baseline_cases.get(case["case"])
+        if not previous:
+            continue
+        for stage in STAGES:
+            for metric in ["seconds", "peak_bytes"]:
+                old_value = previous["stages"][stage][metric]
+                new_value = case["stages"][stage][metric]
+                if old_value and new_value > old_value * (1 + max_regression):
+                    regressions.append(
+                        f"{case['case']} {stage} {metric}: {old_value:.4g} -> {new_value:.4g} "
+                        f"(+{(new_value / old_value - 1) * 100:.0f}%)"
+                    )
+    return regressions
+
+
+def format_results_markdown(results: List[Dict]) -> str:
+    """Format benchmark results as a markdown table."""
+    lines = [
+        "| Case | Paths | Fields | Stage | Time (ms) | Peak memory (KB) |",
+        "| --- | ---: | ---: | --- | ---: | ---: |",
+    ]
+    for case in results:
+        for stage in STAGES:
+            stats = case["stages"][stage]
+            lines.append(
+                f"| {case['case']} | {case['paths']} | {case['fields']} | {stage} "
+                f"| {stats['seconds'] * 1000:.1f} | {stats['peak_bytes'] // 1024} |"
+            )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the OpenAPI field-level diff")
+    parser.add_argument("--sizes", default="100,1000,10000",
+                        help="Comma-separated synthetic spec sizes in paths (default: 100,1000,10000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per stage, best is kept (default: 3)")
+    parser.add_argument("--skip-real-spec", action="store_true", help=f"Do not benchmark {REAL_SPEC_PATH.name}")
+    parser.add_argument("--output-format", choices=["markdown", "json"], default="markdown",
+                        help="Output format (default: markdown)")
+    parser.add_argument("--output-file", help="Also write JSON results to this file")
+    parser.add_argument("--baseline", help="JSON results of a previous run to check for regressions")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Allowed slowdown or memory growth over the baseline (default: 0.25)")
+
+    args = parser.parse_args()
+    differ_module = load_differ_module()
+
+    results = []
+    for size in [int(size) for size in args.sizes.split(",") if size]:
+        print(f"Benchmarking synthetic spec with {size} paths...", file=sys.stderr)
+        old_spec = generate_spec(size)
+        results.append(benchmark_case(differ_module, f"synthetic-{size}", old_spec, mutate_spec(old_spec), args.repeat))
+
+    if not args.skip_real_spec:
+        print(f"Benchmarking {REAL_SPEC_PATH.relative_to(REPO_ROOT)}...", file=sys.stderr)
+        with open(REAL_SPEC_PATH) as f:
+            real_spec = json.load(f)
+        results.append(benchmark_case(differ_module, "openapi.json", real_spec, mutate_spec(real_spec), args.repeat))
+
+    if args.output_file:
+        Path(args.output_file).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output_file, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output_file}", file=sys.stderr)
+
+    if args.output_format == "json":
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_results_markdown(results))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.max_regression)
+        if regressions:
+            print("\nRegressions over baseline:", file=sys.stderr)
+            for regression in regressions:
+                print(f"- {regression}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
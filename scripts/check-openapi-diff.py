@@ -0,0 +1,638 @@
+#!/usr/bin/env python3
+"""
+Behaviour Checks for the OpenAPI Detailed Field-Level Diff
+
+This script runs scripts/openapi-detailed-diff.py against small hand-written
+and synthetic specs and checks what it reports: how each kind of change is
+classified, the enum, constraint and default diffs, HTTP revalidation, the
+JSON Lines and SQLite change writers and the revisions they record,
+AsyncAPI diffs and --impact queries, and that parallel and incremental
+comparisons match a serial one.
+
+Each check prints "ok" or "FAIL" with what went wrong, and the script exits
+non-zero if any fails. The AsyncAPI and overrides checks need PyYAML.
+
+Usage:
+    python3 scripts/check-openapi-diff.py [NAME ...]
+
+Examples:
+    python3 scripts/check-openapi-diff.py
+    python3 scripts/check-openapi-diff.py writers asyncapi
+"""
+
+import argparse
+import copy
+import importlib.util
+import json
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+
+def load_script(name: str):
+    """Import a script from this directory, whose file name is not a valid module name."""
+    module_name = name.replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+benchmark = load_script("benchmark-openapi-diff")
+# Registered under the name the differ's caches and pools pickle FieldRecords by
+differ_module = benchmark.load_differ_module()
+
+
+def item_spec() -> Dict:
+    """A one-operation spec, POST /v1/items, with a query parameter and JSON request and response bodies."""
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Items", "version": "1.0"},
+        "paths": {
+            "/v1/items": {
+                "post": {
+                    "operationId": "create_item",
+                    "summary": "Create an item",
+                    "parameters": [{"name": "limit", "in": "query", "required": False, "schema": {"type": "integer"}}],
+                    "requestBody": {"content": {"application/json": {"schema": {
+                        "type": "object",
+                        "required": ["name"],
+                        "properties": {
+                            "name": {"type": "string", "maxLength": 100},
+                            "voice": {"type": "string", "enum": ["alice", "bob", "carol"]},
+                            "speed": {"type": "number", "minimum": 0.5, "default": 1.0},
+                            "note": {"type": "string", "nullable": True},
+                        },
+                    }}}},
+                    "responses": {"200": {"description": "OK", "content": {"application/json": {"schema": {
+                        "type": "object",
+                        "required": ["id", "status"],
+                        "properties": {
+                            "id": {"type": "string"},
+                            "status": {"type": "string", "enum": ["queued", "done"]},
+                            "url": {"type": "string"},
+                        },
+                    }}}}},
+                }
+            }
+        },
+    }
+
+
+def request_schema(spec: Dict) -> Dict:
+    return spec["paths"]["/v1/items"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+
+
+def response_schema(spec: Dict) -> Dict:
+    return spec["paths"]["/v1/items"]["post"]["responses"]["200"]["content"]["application/json"]["schema"]
+
+
+def parameters(spec: Dict) -> List[Dict]:
+    return spec["paths"]["/v1/items"]["post"]["parameters"]
+
+
+def compare_specs(old_spec: Dict, new_spec: Dict) -> Dict:
+    """Compare two spec documents as the differ does, without overrides or caching."""
+    differ = differ_module.OpenAPIFieldDiff(apply_overrides=False)
+    return differ.compare_endpoint_indexes(differ.get_endpoint_schemas(old_spec),
+                                           differ.get_endpoint_schemas(new_spec))
+
+
+def edited_rows(edit: Callable[[Dict], Any]) -> List[Dict]:
+    """The change rows produced by applying `edit` to a copy of item_spec()."""
+    old_spec = item_spec()
+    new_spec = copy.deepcopy(old_spec)
+    edit(new_spec)
+    differ = differ_module.OpenAPIFieldDiff(apply_overrides=False)
+    return differ.change_rows(compare_specs(old_spec, new_spec))
+
+
+def write_documents(directory: str, documents: Dict[str, Any]) -> Dict[str, str]:
+    """Write JSON documents into a directory and return their paths by name; JSON is valid YAML too."""
+    paths = {}
+    for name, document in documents.items():
+        paths[name] = str(Path(directory) / name)
+        with open(paths[name], "w") as f:
+            json.dump(document, f)
+    return paths
+
+
+# (description, edit of item_spec(), expected (location, field, change, breaking) rows)
+CLASSIFICATION_CASES = [
+    ("optional request field added",
+     lambda spec: request_schema(spec)["properties"].update(pitch={"type": "number"}),
+     {("request_body", "pitch", "added", False)}),
+    ("required request field added",
+     lambda spec: (request_schema(spec)["properties"].update(pitch={"type": "number"}),
+                   request_schema(spec)["required"].append("pitch")),
+     {("request_body", "pitch", "added", True)}),
+    ("request field removed",
+     lambda spec: request_schema(spec)["properties"].pop("voice"),
+     {("request_body", "voice", "removed", False)}),
+    ("request field type changed",
+     lambda spec: request_schema(spec)["properties"]["name"].update(type="integer"),
+     {("request_body", "name", "type_changed", True)}),
+    ("optional request field made required",
+     lambda spec: request_schema(spec)["required"].append("voice"),
+     {("request_body", "voice", "required_changed", True)}),
+    ("required request field made optional",
+     lambda spec: request_schema(spec)["required"].remove("name"),
+     {("request_body", "name", "required_changed", False)}),
+    ("nullable request field made non-nullable",
+     lambda spec: request_schema(spec)["properties"]["note"].pop("nullable"),
+     {("request_body", "note", "modified", True)}),
+    ("response field added",
+     lambda spec: response_schema(spec)["properties"].update(size={"type": "integer"}),
+     {("response", "size", "added", False)}),
+    ("response field removed",
+     lambda spec: response_schema(spec)["properties"].pop("url"),
+     {("response", "url", "removed", True)}),
+    ("required response field made optional",
+     lambda spec: response_schema(spec)["required"].remove("status"),
+     {("response", "status", "required_changed", True)}),
+    ("response field made nullable",
+     lambda spec: response_schema(spec)["properties"]["id"].update(nullable=True),
+     {("response", "id", "modified", True)}),
+    ("optional query parameter added",
+     lambda spec: parameters(spec).append({"name": "cursor", "in": "query", "schema": {"type": "string"}}),
+     {("parameter", "cursor", "added", False)}),
+    ("required query parameter added",
+     lambda spec: parameters(spec).append({"name": "cursor", "in": "query", "required": True,
+                                           "schema": {"type": "string"}}),
+     {("parameter", "cursor", "added", True)}),
+    ("query parameter removed",
+     lambda spec: parameters(spec).clear(),
+     {("parameter", "limit", "removed", True)}),
+]
+
+
+def check_breaking_change_rules() -> List[str]:
+    """Every kind of change is classified as breaking or compatible by BREAKING_CHANGE_RULES."""
+    failures = []
+    rules = differ_module.BREAKING_CHANGE_RULES
+    for kind in differ_module.FIELD_CHANGE_KINDS:
+        for direction in ("request", "response"):
+            if ("body", kind, direction) not in rules:
+                failures.append(f"no rule for {kind} {direction} body fields")
+    for location in differ_module.PARAMETER_LOCATIONS:
+        for kind in ("added", "removed", "modified"):
+            if (location, kind, "request") not in rules:
+                failures.append(f"no rule for {kind} {location} parameters")
+
+    for description, edit, expected in CLASSIFICATION_CASES:
+        rows = {(row["location"], row["field"], row["change"], row["breaking"]) for row in edited_rows(edit)}
+        if rows != expected:
+            failures.append(f"{description}: expected {sorted(expected)}, got {sorted(rows)}")
+    return failures
+
+
+def check_value_set_diffs() -> List[str]:
+    """Enum values, constraints and defaults are diffed value by value and classified by direction."""
+    def edit(spec: Dict) -> None:
+        request = request_schema(spec)["properties"]
+        request["voice"]["enum"] = ["bob", "carol", "dave"]
+        request["name"]["maxLength"] = 50
+        request["speed"].update(minimum=0.25, default=1.5)
+        response_schema(spec)["properties"]["status"]["enum"] = ["done", "failed"]
+
+    expected = [
+        ("request_body", "voice", "enum_values_added", False, {"values": ["dave"]}),
+        ("request_body", "voice", "enum_values_removed", True, {"values": ["alice"]}),
+        ("request_body", "name", "constraint_changed", True,
+         {"constraint": "maxLength", "old_value": 100, "new_value": 50, "tightened": True}),
+        ("request_body", "speed", "constraint_changed", False,
+         {"constraint": "minimum", "old_value": 0.5, "new_value": 0.25, "tightened": False}),
+        ("request_body", "speed", "default_changed", False, {"old_default": 1.0, "new_default": 1.5}),
+        ("response", "status", "enum_values_added", False, {"values": ["failed"]}),
+        ("response", "status", "enum_values_removed", False, {"values": ["queued"]}),
+    ]
+    rows = edited_rows(edit)
+    failures = []
+    for location, field, change, breaking, details in expected:
+        matches = [row for row in rows if (row["location"], row["field"], row["change"]) == (location, field, change)]
+        if len(matches) != 1:
+            failures.append(f"expected one {change} row for {location} {field}, got {len(matches)}")
+            continue
+        row = matches[0]
+        if row["breaking"] is not breaking:
+            failures.append(f"{change} of {location} {field} is classified breaking={row['breaking']}")
+        for key, value in details.items():
+            if row["details"].get(key) != value:
+                failures.append(f"{change} of {location} {field} has {key}={row['details'].get(key)!r}, "
+                                f"expected {value!r}")
+    if len(rows) != len(expected):
+        failures.append(f"expected {len(expected)} change rows, got {len(rows)}")
+    return failures
+
+
+def check_shared_schema_changes() -> List[str]:
+    """A shared schema change is reported once under Updated Schemas, not under every endpoint using it."""
+    def spec_with(error_properties: Dict) -> Dict:
+        spec = {"openapi": "3.0.0", "info": {"title": "Items", "version": "1.0"}, "paths": {},
+                "components": {"schemas": {"Error": {"type": "object", "properties": error_properties}}}}
+        for index in range(3):
+            spec["paths"][f"/v1/items/{index}"] = {"get": {
+                "operationId": f"get_item_{index}",
+                "responses": {"422": {"description": "Invalid", "content": {"application/json": {
+                    "schema": {"$ref": "#/components/schemas/Error"}}}}},
+            }}
+        return spec
+
+    comparison = compare_specs(spec_with({"detail": {"type": "string"}}),
+                               spec_with({"detail": {"type": "string"}, "hint": {"type": "string"}}))
+    differ = differ_module.OpenAPIFieldDiff(apply_overrides=False)
+    markdown = differ.format_changes_markdown(comparison)
+    failures = []
+    if list(comparison["modified_schemas"]) != ["Error"]:
+        failures.append(f"expected Error under modified_schemas, got {list(comparison['modified_schemas'])}")
+    elif len(comparison["modified_schemas"]["Error"]["endpoints"]) != 3:
+        failures.append("the Error schema is not listed as used by all three endpoints")
+    if "## Updated Endpoints" in markdown:
+        failures.append("endpoints whose only change is a shared schema are listed under Updated Endpoints")
+    if markdown.count("hint") != 1:
+        failures.append(f"the added field is reported {markdown.count('hint')} times instead of once")
+    if len(differ.change_rows(comparison)) != 3:
+        failures.append("the shared schema change does not produce one change row per endpoint")
+    return failures
+
+
+class SpecServer:
+    """A local server for one spec document, honouring If-None-Match, that logs each request it answers."""
+
+    def __init__(self, body: bytes, etag: str):
+        self.body = body
+        self.etag = etag
+        self.requests: List[Tuple[Optional[str], int]] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.headers.get("If-None-Match") == server.etag:
+                    status, body = 304, b""
+                else:
+                    status, body = 200, server.body
+                server.requests.append((self.headers.get("If-None-Match"), status))
+                self.send_response(status)
+                self.send_header("ETag", server.etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/openapi.json"
+
+    def __enter__(self) -> "SpecServer":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def check_http_revalidation() -> List[str]:
+    """An HTTP spec is revalidated with its ETag, and a 304 reuses the stored copy without downloading it."""
+    old_body = json.dumps(item_spec()).encode()
+    new_spec = item_spec()
+    response_schema(new_spec)["properties"].pop("url")
+    new_body = json.dumps(new_spec).encode()
+    failures = []
+
+    with tempfile.TemporaryDirectory() as cache_dir, SpecServer(old_body, '"v1"') as server:
+        def fetch(offline: bool = False) -> Tuple[Optional[str], Optional[bytes]]:
+            source = differ_module.HttpSpecSource(server.url, Path(cache_dir), offline)
+            return source.locate(), source.read()
+
+        first = fetch()
+        second = fetch()
+        server.body, server.etag = new_body, '"v2"'
+        third = fetch()
+        offline = fetch(offline=True)
+
+    if first != (differ_module.git_blob_sha(old_body), old_body):
+        failures.append("the first fetch does not return the served spec and its blob SHA")
+    if second != first:
+        failures.append("a 304 Not Modified does not reuse the stored copy")
+    if third != (differ_module.git_blob_sha(new_body), new_body):
+        failures.append("a changed spec is not downloaded again")
+    if offline != third:
+        failures.append("--offline does not use the last downloaded copy")
+    expected_requests = [(None, 200), ('"v1"', 304), ('"v1"', 200)]
+    if server.requests != expected_requests:
+        failures.append(f"expected requests {expected_requests}, got {server.requests}")
+    return failures
+
+
+def check_change_writers() -> List[str]:
+    """The JSON Lines and SQLite writers record the same rows and skip the same intervals on a rerun."""
+    old_spec = item_spec()
+    new_spec = copy.deepcopy(old_spec)
+    response_schema(new_spec)["properties"].pop("url")
+    parameters(new_spec).clear()
+    failures = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = write_documents(tmp, {"old.json": old_spec, "new.json": new_spec})
+        old_sha = differ_module.LocalFileSource(files["old.json"]).locate()
+        new_sha = differ_module.LocalFileSource(files["new.json"]).locate()
+        outputs = {"jsonl": str(Path(tmp) / "changes.jsonl"), "sqlite": str(Path(tmp) / "changes.db")}
+        writers = {"jsonl": differ_module.JsonLinesChangeWriter, "sqlite": differ_module.SqliteChangeWriter}
+
+        for output_format, make_writer in writers.items():
+            differ = differ_module.OpenAPIFieldDiff(apply_overrides=False)
+            for _ in range(2):
+                writer = make_writer(outputs[output_format])
+                summaries = [
+                    differ.compare_sources(differ_module.LocalFileSource(files[old]),
+                                           differ_module.LocalFileSource(files[new]), output_format, writer=writer)
+                    for old, new in (("old.json", "new.json"), ("new.json", "new.json"))
+                ]
+                writer.close()
+            # The second pass finds both intervals, including the one without changes, already recorded
+            if not all(summary.endswith("are already recorded") for summary in summaries):
+                failures.append(f"{output_format}: a rerun diffed recorded intervals again: {summaries}")
+
+        with open(outputs["jsonl"]) as f:
+            jsonl_rows = [json.loads(line) for line in f]
+        db = sqlite3.connect(outputs["sqlite"])
+        db.row_factory = sqlite3.Row
+        sqlite_rows = [dict(row) for row in db.execute("SELECT * FROM changes")]
+        intervals = db.execute("SELECT COUNT(*) FROM intervals").fetchone()[0]
+        db.close()
+
+    changes = [row for row in jsonl_rows if row["change"] is not None]
+    markers = [row for row in jsonl_rows if row["change"] is None]
+    expected = {("response", "url", "removed", True), ("parameter", "limit", "removed", True)}
+    for output_format, rows in (("jsonl", changes), ("sqlite", sqlite_rows)):
+        found = {(row["location"], row["field"], row["change"], bool(row["breaking"])) for row in rows}
+        if found != expected:
+            failures.append(f"{output_format}: expected rows {sorted(expected)}, got {sorted(found)}")
+        for row in rows:
+            if (row["from_revision"], row["to_revision"]) != (old_sha, new_sha) or not row["to_date"]:
+                failures.append(f"{output_format}: row for {row['field']} lacks resolved revisions or dates")
+                break
+    if len(markers) != 1 or markers[0]["from_key"] != markers[0]["to_key"]:
+        failures.append(f"jsonl: expected one marker row for the interval without changes, got {len(markers)}")
+    if intervals != 2:
+        failures.append(f"sqlite: expected 2 recorded intervals, got {intervals}")
+    return failures
+
+
+def check_git_provenance() -> List[str]:
+    """Change rows name a git revision by its commit SHA and commit date, not by the revision given."""
+    repo_dir = str(SCRIPTS_DIR.parent)
+    expected = subprocess.run(["git", "log", "-1", "--format=%H %cd", "--date=format-local:%Y-%m-%d", "HEAD"],
+                              cwd=repo_dir, capture_output=True, text=True, check=True).stdout.split()
+    with differ_module.GitObjectReader(repo_dir) as reader:
+        source = differ_module.GitRevisionSource("HEAD", "fern/apis/api/openapi.json", reader)
+        provenance = list(source.provenance())
+    if provenance != expected:
+        return [f"expected HEAD to resolve to {expected}, got {provenance}"]
+    return []
+
+
+def asyncapi_document(query: Dict[str, Dict], server_message: Dict[str, Dict], channels: Tuple[str, ...]) -> Dict:
+    """An AsyncAPI 2 document whose channels share a ws query binding and a server message payload."""
+    return {
+        "asyncapi": "2.6.0",
+        "info": {"title": "Streaming", "version": "1.0"},
+        "channels": {
+            channel: {
+                "summary": f"Stream {channel}",
+                "bindings": {"ws": {"query": {"type": "object", "properties": query}}},
+                "subscribe": {"message": {"$ref": "#/components/messages/AudioOutput"}},
+            }
+            for channel in channels
+        },
+        "components": {
+            "messages": {"AudioOutput": {"payload": {"$ref": "#/components/schemas/AudioOutput"}}},
+            "schemas": {
+                "OutputFormat": {"type": "string", "enum": ["mp3_44100_128", "pcm_16000"]},
+                "AudioOutput": {"type": "object", "properties": server_message},
+            },
+        },
+    }
+
+
+def check_asyncapi_diff() -> List[str]:
+    """AsyncAPI diffs treat ws query bindings as query parameters and server messages as responses."""
+    query = {
+        "output_format": {"$ref": "#/components/schemas/OutputFormat"},
+        "inactivity_timeout": {"type": "integer", "default": 20},
+    }
+    message = {"audio": {"type": "string"}}
+    old_document = asyncapi_document(query, message, ("/v1/stream", "/v1/legacy"))
+    new_query = {name: schema for name, schema in query.items() if name != "inactivity_timeout"}
+    new_message = {**message, "alignment": {"type": "object"}}
+    new_document = asyncapi_document(new_query, new_message, ("/v1/stream",))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = write_documents(tmp, {"old.yml": old_document, "new.yml": new_document})
+        differ = differ_module.OpenAPIFieldDiff(apply_overrides=False)
+        sources = [("asyncapi.yml", differ_module.LocalFileSource(files["old.yml"]),
+                    differ_module.LocalFileSource(files["new.yml"]))]
+        report = differ.compare_asyncapi_sources(sources, "json")
+        markdown = differ.compare_asyncapi_sources(sources)
+
+    if report.startswith("Error"):
+        return [report]
+    comparison = json.loads(report)["asyncapi.yml"]
+    failures = []
+    if [channel["channel"] for channel in comparison["removed_channels"]] != ["/v1/legacy"]:
+        failures.append("the deleted channel is not reported as removed")
+    changes = comparison["modified_channels"].get("/v1/stream")
+    if changes is None:
+        return failures + ["the changed channel is not reported as modified"]
+    if not changes["breaking"]:
+        failures.append("removing a ws query parameter is not breaking")
+    removed = changes.get("parameters", {}).get("removed", [])
+    if [(param["name"], param["in"], param["breaking"]) for param in removed] != [("inactivity_timeout", "query", True)]:
+        failures.append(f"expected inactivity_timeout removed as a breaking query parameter, got {removed}")
+    added = changes.get("subscribe", {}).get("AudioOutput", {}).get("added", [])
+    if [(change["field"], change["breaking"]) for change in added] != [("alignment", False)]:
+        failures.append(f"expected alignment added to the server message as compatible, got {added}")
+    if "- `/v1/stream` - 🚨 **BREAKING**" not in markdown or "Removed: `inactivity_timeout`" not in markdown:
+        failures.append("the markdown does not flag the removed query parameter as breaking")
+    return failures
+
+
+def check_schema_impact() -> List[str]:
+    """--impact lists the operations and channels reaching a schema through $ref, allOf, anyOf and oneOf."""
+    ref = {"$ref": "#/components/schemas/OutputFormat"}
+    spec = {
+        "openapi": "3.0.0",
+        "info": {"title": "Impact", "version": "1.0"},
+        "paths": {
+            "/v1/convert": {"post": {
+                "requestBody": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/Settings"}}}},
+                "responses": {"200": {"description": "OK"}},
+            }},
+            "/v1/voices": {"get": {
+                "responses": {"200": {"description": "OK", "content": {"application/json": {
+                    "schema": {"anyOf": [{"$ref": "#/components/schemas/Wrapper"}, {"type": "null"}]}}}}},
+            }},
+            "/v1/models": {"get": {
+                "responses": {"200": {"description": "OK", "content": {"application/json": {
+                    "schema": {"type": "array", "items": {"type": "string"}}}}}},
+            }},
+        },
+        "components": {"schemas": {
+            "OutputFormat": {"type": "string", "enum": ["mp3_44100_128", "pcm_16000"]},
+            "Settings": {"allOf": [{"type": "object", "properties": {"format": ref}}]},
+            "Wrapper": {"oneOf": [{"$ref": "#/components/schemas/Settings"}, {"type": "string"}]},
+        }},
+    }
+    asyncapi = asyncapi_document({"output_format": ref}, {"audio": {"type": "string"}}, ("/v1/stream",))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = write_documents(tmp, {"openapi.json": spec, "asyncapi.yml": asyncapi})
+        differ = differ_module.OpenAPIFieldDiff(apply_overrides=False)
+        source = differ_module.LocalFileSource(files["openapi.json"])
+        asyncapi_sources = [("asyncapi.yml", differ_module.LocalFileSource(files["asyncapi.yml"]))]
+        impact = differ.schema_impact("OutputFormat", source, asyncapi_sources, "json")
+        misspelt = differ.schema_impact("OutputFormats", source, asyncapi_sources, "json")
+
+    if impact.startswith("Error"):
+        return [impact]
+    impact = json.loads(impact)
+    failures = []
+    if sorted(impact["endpoints"]) != ["GET /v1/voices", "POST /v1/convert"]:
+        failures.append(f"expected POST /v1/convert and GET /v1/voices, got {impact['endpoints']}")
+    if impact["channels"] != {"asyncapi.yml": ["/v1/stream"]}:
+        failures.append(f"expected the /v1/stream channel, got {impact['channels']}")
+    if "did you mean `OutputFormat`" not in misspelt:
+        failures.append(f"a misspelt schema name gets no suggestion: {misspelt}")
+    return failures
+
+
+def check_overrides_keep_removed_paths() -> List[str]:
+    """A path deleted from the spec is reported as removed even though the overrides file still mentions it."""
+    old_spec = benchmark.generate_spec(20)
+    new_spec = copy.deepcopy(old_spec)
+    removed_path = "/v1/resource_3/{item_id}"
+    del new_spec["paths"][removed_path]
+    overrides = {"paths": {removed_path: {"post": {"summary": "Overridden summary"}}}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = write_documents(tmp, {"old.json": old_spec, "new.json": new_spec, "overrides.yml": overrides})
+        differ = differ_module.OpenAPIFieldDiff()
+        differ.overrides_path = files["overrides.yml"]
+        comparison = differ.compare_endpoint_indexes(
+            differ.load_source_index(differ_module.LocalFileSource(files["old.json"])),
+            differ.load_source_index(differ_module.LocalFileSource(files["new.json"])),
+        )
+
+    failures = []
+    removed = {endpoint["endpoint"] for endpoint in comparison["removed_endpoints"]}
+    for endpoint in (f"GET {removed_path}", f"POST {removed_path}"):
+        if endpoint not in removed:
+            failures.append(f"{endpoint} is not reported as removed with overrides applied")
+        if endpoint in comparison["modified_endpoints"]:
+            failures.append(f"{endpoint} is reported as modified after its path was deleted")
+    return failures
+
+
+def without_fingerprints(index: Dict[str, Dict]) -> Dict[str, Dict]:
+    """A copy of an endpoint index whose fingerprints never match, so nothing can be skipped."""
+    def unique(prints: Any) -> Any:
+        if isinstance(prints, dict):
+            return {key: unique(value) for key, value in prints.items()}
+        return object()
+
+    return {endpoint: {**info, "fingerprints": unique(info["fingerprints"])} for endpoint, info in index.items()}
+
+
+def check_comparison_parity() -> List[str]:
+    """Parallel, fingerprint-skipping and incremental comparisons all match a full serial one."""
+    old_spec = benchmark.generate_spec(200)
+    watched_spec = benchmark.mutate_spec(old_spec, fraction=0.05)
+    # A later edit confined to one path, as when a spec under --watch is saved again
+    new_spec = copy.deepcopy(watched_spec)
+    edited = new_spec["paths"][next(iter(new_spec["paths"]))]["get"]
+    edited["parameters"].append({"name": "cursor", "in": "query", "required": True, "schema": {"type": "string"}})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = write_documents(tmp, {"old.json": old_spec, "watched.json": watched_spec, "new.json": new_spec})
+        sources = {name: differ_module.LocalFileSource(path) for name, path in files.items()}
+
+        differ = differ_module.OpenAPIFieldDiff(apply_overrides=False)
+        serial = differ.compare_sources(sources["old.json"], sources["new.json"], "json")
+        parallel = differ.compare_sources(sources["old.json"], sources["new.json"], "json", jobs=2)
+
+        old_index = differ.get_endpoint_schemas(sources["old.json"].load())
+        new_index = differ.get_endpoint_schemas(sources["new.json"].load())
+        unskipped = differ.compare_endpoint_indexes(without_fingerprints(old_index), without_fingerprints(new_index))
+
+        # What --watch does: index the watched file, then re-diff only the paths an edit touched
+        incremental = differ_module.IncrementalEndpointIndex(differ)
+        incremental.update(sources["watched.json"].load())
+        previous = differ.recompare_paths(old_index, incremental.endpoints, None, [])
+        dirty = incremental.update(sources["new.json"].load())
+        recompared = differ.recompare_paths(old_index, incremental.endpoints, previous, dirty)
+
+    failures = []
+    if not json.loads(serial)["modified_endpoints"]:
+        failures.append("the synthetic specs have no modified endpoints to compare")
+    if parallel != serial:
+        failures.append("--jobs 2 differs from the serial comparison")
+    if json.dumps(unskipped, indent=2) != serial:
+        failures.append("comparing without fingerprint skips differs from the serial comparison")
+    if json.dumps(recompared, indent=2) != serial:
+        failures.append("recompare_paths after an incremental update differs from the serial comparison")
+    if len(dirty) != 1:
+        failures.append(f"the incremental update re-flattened {len(dirty)} paths instead of the edited one")
+    return failures
+
+
+CHECKS = [
+    check_breaking_change_rules,
+    check_value_set_diffs,
+    check_shared_schema_changes,
+    check_http_revalidation,
+    check_change_writers,
+    check_git_provenance,
+    check_asyncapi_diff,
+    check_schema_impact,
+    check_overrides_keep_removed_paths,
+    check_comparison_parity,
+]
+
+
+def run_checks(names: List[str]) -> bool:
+    """Run every check whose name contains one of `names` (all by default); returns whether all passed."""
+    passed = True
+    for check in CHECKS:
+        if names and not any(name in check.__name__ for name in names):
+            continue
+        try:
+            failures = check()
+        except Exception as e:
+            failures = [f"raised {type(e).__name__}: {e}"]
+        print(f"{'FAIL' if failures else 'ok'}: {check.__doc__.splitlines()[0]}")
+        for failure in failures:
+            print(f"  - {failure}")
+        passed &= not failures
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the behaviour of the OpenAPI field-level diff")
+    parser.add_argument("names", nargs="*", metavar="NAME",
+                        help="Only run checks whose function name contains one of these (default: all)")
+    args = parser.parse_args()
+    sys.exit(0 if run_checks(args.names) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,27 +3,1505 @@
 OpenAPI Detailed Field-Level Diff Generator for ElevenLabs Changelog
 
 This script compares two OpenAPI specifications and generates detailed
-field-level changes suitable for changelog entries.
+field-level changes suitable for changelog entries. Each spec is compared
+with fern/apis/api/openapi-overrides.yml merged in, as the SDKs see it.
+Changes to shared component schemas are reported once per schema, with the
+endpoints that use it, rather than under every one of those endpoints.
 
 Usage:
     python3 scripts/openapi-detailed-diff.py [--from-date YYYY-MM-DD] [--output-format {markdown,json}]
+    python3 scripts/openapi-detailed-diff.py --range FROM..TO [--every 7d] [--jobs N]
+    python3 scripts/openapi-detailed-diff.py --asyncapi [FILE ...] (--from-date YYYY-MM-DD | --from SOURCE) [--to SOURCE]
+    python3 scripts/openapi-detailed-diff.py --watch [SECONDS] (--from-date YYYY-MM-DD | --from SOURCE) [--to FILE]
+    python3 scripts/openapi-detailed-diff.py --impact SCHEMA [--to SOURCE] [--asyncapi [FILE ...]]
+    python3 scripts/openapi-detailed-diff.py --regions [BASE_URL ...]
     
 Examples:
     python3 scripts/openapi-detailed-diff.py --from-date 2025-08-20
     python3 scripts/openapi-detailed-diff.py --from-date 2025-08-20 --output-format json
+    python3 scripts/openapi-detailed-diff.py --range 2025-07-01..2025-08-01 --every 7d
+    python3 scripts/openapi-detailed-diff.py --asyncapi --from git:HEAD~10
+    python3 scripts/openapi-detailed-diff.py --watch --from git:main
+    python3 scripts/openapi-detailed-diff.py --impact TextToSpeechOutputFormatEnum --to file:fern/apis/api/openapi.json
+    python3 scripts/openapi-detailed-diff.py --regions
+    python3 scripts/openapi-detailed-diff.py --regions http://localhost:8001 http://localhost:8002
+    python3 scripts/openapi-detailed-diff.py --from git:HEAD~10 --to file:fern/apis/api/openapi.json --no-overrides
 """
 
 import json
+import os
+import re
 import sys
+import hashlib
+import pickle
+import tempfile
 import subprocess
 import argparse
+import asyncio
+import bisect
+import difflib
+import http.client
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext, redirect_stdout
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from functools import wraps
+from typing import Dict, List, Any, Iterator, Optional, Tuple, Union
 from pathlib import Path
 
-class OpenAPIFieldDiff:
+
+# Bump whenever the shape of the cached endpoint index changes
+INDEX_CACHE_VERSION = 8
+
+DEFAULT_BASE_URL = "https://api.elevenlabs.io"
+
+# Validation keywords compared per field; raising a lower bound or lowering an upper bound tightens it
+LOWER_BOUND_CONSTRAINTS = ("minimum", "exclusiveMinimum", "minLength", "minItems")
+UPPER_BOUND_CONSTRAINTS = ("maximum", "exclusiveMaximum", "maxLength", "maxItems")
+CONSTRAINT_KEYS = LOWER_BOUND_CONSTRAINTS + UPPER_BOUND_CONSTRAINTS + ("pattern",)
+
+
+def _attribute_became(attribute: str, old_value: Any, new_value: Any):
+    """Rule matching a "modified" field change that flips `attribute` from old_value to new_value."""
+    def rule(change: Dict) -> bool:
+        return any(c["attribute"] == attribute and c["old_value"] == old_value and c["new_value"] == new_value
+                   for c in change.get("changes", []))
+    return rule
+
+
+# Kinds of field-level change, in the order compare_field_sets reports them
+FIELD_CHANGE_KINDS = ("added", "removed", "modified", "type_changed", "required_changed", "enum_values_added",
+                      "enum_values_removed", "constraint_changed", "default_changed")
+
+# Whether a field change breaks clients, keyed by (change kind, direction). Clients send
+# requests, so narrowing what a request accepts breaks them; they read responses, so a
+# response that may now omit or null a field breaks them. A rule is a constant or a
+# predicate on the change record.
+FIELD_CHANGE_RULES = {
+    ("added", "request"): lambda change: bool(change["details"].get("required")),
+    ("added", "response"): False,
+    ("removed", "request"): False,
+    ("removed", "response"): True,
+    ("type_changed", "request"): True,
+    ("type_changed", "response"): True,
+    ("required_changed", "request"): lambda change: change["new_required"] and not change["old_required"],
+    ("required_changed", "response"): lambda change: change["old_required"] and not change["new_required"],
+    ("modified", "request"): _attribute_became("nullable", True, False),
+    ("modified", "response"): _attribute_became("nullable", False, True),
+    ("enum_values_added", "request"): False,
+    ("enum_values_added", "response"): False,
+    ("enum_values_removed", "request"): True,
+    ("enum_values_removed", "response"): False,
+    ("constraint_changed", "request"): lambda change: change["tightened"],
+    ("constraint_changed", "response"): False,
+    ("default_changed", "request"): False,
+    ("default_changed", "response"): False,
+}
+
+# Whether a parameter change breaks clients, keyed by change kind. Removing a parameter
+# drops an SDK argument, and path parameters are part of the URL itself.
+PARAMETER_CHANGE_RULES = {
+    "added": lambda param: bool(param.get("required")),
+    "removed": True,
+    "modified": lambda change: (bool(change["new"].get("required")) and not change["old"].get("required")) or
+                               change["old"].get("type") != change["new"].get("type"),
+}
+PARAMETER_LOCATIONS = ("path", "query", "header", "cookie")
+
+# The full classifier table, keyed by (location, change kind, direction); locations are
+# "body" for request and response bodies and messages, or the `in` of a parameter
+BREAKING_CHANGE_RULES = {
+    **{("body", kind, direction): rule for (kind, direction), rule in FIELD_CHANGE_RULES.items()},
+    **{(location, kind, "request"): rule
+       for location in PARAMETER_LOCATIONS for kind, rule in PARAMETER_CHANGE_RULES.items()},
+    ("path", "added", "request"): True,
+}
+
+
+class DiffProfile:
+    """Stage timers and counters for a diff run, written as a JSON sidecar with --profile.
+    
+    Disabled by default, in which case every hook returns after one attribute
+    check. Stage times are inclusive: a stage entered from within another
+    (e.g. `git` during `load`) counts towards both. Work done in worker
+    processes shows up only as the time the parent spends waiting on them.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+        self.started = time.perf_counter()
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            totals = self.stages.setdefault(name, [0.0, 0])
+            totals[0] += time.perf_counter() - start
+            totals[1] += 1
+
+    def timed(self, name: str):
+        """Decorator timing every call of a function as a stage."""
+        def decorate(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def report(self) -> Dict[str, Any]:
+        report = {
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "argv": sys.argv[1:],
+            "total_seconds": round(time.perf_counter() - self.started, 6),
+            "stages": {
+                name: {"seconds": round(seconds, 6), "calls": calls}
+                for name, (seconds, calls) in sorted(self.stages.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
+        try:
+            import resource
+        except ImportError:
+            return report
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        scale = 1024 if sys.platform == "darwin" else 1
+        report["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale
+        report["children_peak_rss_kb"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale
+        return report
+
+
+PROFILE = DiffProfile()
+
+
+def git_blob_sha(data: bytes) -> str:
+    """Compute the git blob SHA of some content, matching `git hash-object`."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+# Top-level spec sections the differ reads; everything else is skipped unparsed
+SPEC_SECTIONS = ("openapi", "paths", "components")
+
+# Keys of a path item that are operations
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_JSON_DECODER = json.JSONDecoder()
+
+
+def read_stream(stream, chunk_size: int = 1 << 16) -> bytes:
+    """Read a binary stream incrementally into a single buffer without text decoding."""
+    buffer = bytearray()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+    PROFILE.count("bytes_read", len(buffer))
+    return bytes(buffer)
+
+
+def _scan_json_object(text: str, pos: int, handle_member) -> int:
+    """Walk the members of the JSON object starting at `pos`.
+    
+    `handle_member(key, value_start)` decides whether to decode, skip or
+    descend into each value and returns the offset where the value ends.
+    Returns the offset just past the object.
+    """
+    pos = _WHITESPACE.match(text, pos + 1).end()
+    if text[pos:pos + 1] == "}":
+        return pos + 1
+    while True:
+        key, pos = _JSON_DECODER.raw_decode(text, pos)
+        if not isinstance(key, str):
+            raise ValueError(f"Expected object key at offset {pos}")
+        pos = _WHITESPACE.match(text, pos).end()
+        if text[pos:pos + 1] != ":":
+            raise ValueError(f"Expected ':' at offset {pos}")
+        value_start = _WHITESPACE.match(text, pos + 1).end()
+        pos = _WHITESPACE.match(text, handle_member(key, value_start)).end()
+        separator = text[pos:pos + 1]
+        if separator == "}":
+            return pos + 1
+        if separator != ",":
+            raise ValueError(f"Expected ',' or '}}' at offset {pos}")
+        pos = _WHITESPACE.match(text, pos + 1).end()
+
+
+class LazySchemaMap(Mapping):
+    """Read-only view of `components/schemas` that decodes each schema on first access.
+    
+    Overrides for individual schemas are merged in as each schema is decoded.
+    """
+
+    def __init__(self, text: str, offsets: Dict[str, int], overrides: Optional[Mapping] = None,
+                 end: Optional[int] = None):
+        self._text = text
+        self._offsets = offsets
+        self._overrides = overrides or {}
+        # Offset where the schemas object ends in `text`
+        self._end = end if end is not None else len(text)
+        self._decoded: Dict[str, Any] = {}
+        self._names = [name for name in offsets if self._overrides.get(name, True) is not None]
+        self._names.extend(
+            name for name, value in self._overrides.items() if name not in offsets and value is not None
+        )
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._decoded:
+            if self._overrides.get(name, True) is None:
+                raise KeyError(name)
+            if name not in self._offsets:
+                self._decoded[name] = self._overrides[name]
+            else:
+                PROFILE.count("schemas_decoded")
+                schema = _JSON_DECODER.raw_decode(self._text, self._offsets[name])[0]
+                if name in self._overrides:
+                    schema = merge_overrides(schema, self._overrides[name])
+                self._decoded[name] = schema
+        return self._decoded[name]
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def with_overrides(self, overrides: Mapping) -> "LazySchemaMap":
+        """A view of the same document with further schema overrides applied."""
+        merged = dict(self._overrides)
+        for name, value in overrides.items():
+            both = merged.get(name) is not None and value is not None
+            merged[name] = merge_overrides(merged[name], value) if both else value
+        return LazySchemaMap(self._text, self._offsets, merged, self._end)
+
+    def content_hashes(self) -> Dict[str, str]:
+        """Hash each schema's source text and override without decoding it.
+        
+        A schema's text is taken to run up to the next schema's offset, so an
+        edit may also mark its neighbour as changed, but never goes unnoticed.
+        """
+        starts = sorted(self._offsets.values())
+        ends = dict(zip(starts, starts[1:]))
+        hashes = {}
+        for name in self._names:
+            digest = hashlib.blake2b(digest_size=16)
+            if name in self._offsets:
+                start = self._offsets[name]
+                digest.update(self._text[start:ends.get(start, self._end)].encode())
+            if name in self._overrides:
+                digest.update(json.dumps(self._overrides[name], sort_keys=True, default=str).encode())
+            hashes[name] = digest.hexdigest()
+        return hashes
+
+
+@PROFILE.timed("parse")
+def load_spec_lazily(data: bytes) -> Dict:
+    """Parse only the parts of an OpenAPI document the differ needs.
+    
+    `paths` and the small component sections are decoded eagerly, while
+    `components/schemas` becomes a LazySchemaMap so schemas no endpoint
+    references are never kept in memory. Other top-level sections are
+    scanned past one at a time and dropped.
+    """
+    text = data.decode("utf-8") if isinstance(data, (bytes, bytearray)) else data
+    spec: Dict[str, Any] = {}
+    
+    def skip(key: str, start: int) -> int:
+        return _JSON_DECODER.raw_decode(text, start)[1]
+    
+    def handle_component_section(section: str, start: int) -> int:
+        if section != "schemas" or text[start:start + 1] != "{":
+            spec["components"][section], end = _JSON_DECODER.raw_decode(text, start)
+            return end
+        
+        offsets: Dict[str, int] = {}
+        
+        def record_schema(name: str, schema_start: int) -> int:
+            offsets[name] = schema_start
+            return skip(name, schema_start)
+        
+        end = _scan_json_object(text, start, record_schema)
+        spec["components"]["schemas"] = LazySchemaMap(text, offsets, end=end)
+        return end
+    
+    def handle_section(key: str, start: int) -> int:
+        if key not in SPEC_SECTIONS:
+            return skip(key, start)
+        if key == "components" and text[start:start + 1] == "{":
+            spec["components"] = {}
+            return _scan_json_object(text, start, handle_component_section)
+        spec[key], end = _JSON_DECODER.raw_decode(text, start)
+        return end
+    
+    pos = _WHITESPACE.match(text).end()
+    try:
+        if text[pos:pos + 1] != "{":
+            raise ValueError("Expected a JSON object")
+        _scan_json_object(text, pos, handle_section)
+    except json.JSONDecodeError:
+        raise
+    except (ValueError, UnicodeDecodeError) as e:
+        raise json.JSONDecodeError(f"Malformed OpenAPI document: {e}", text, pos)
+    return spec
+
+
+@PROFILE.timed("parse")
+def load_yaml_spec(data: bytes) -> Dict:
+    """Parse a YAML document, using libyaml's CSafeLoader when available.
+    
+    PyYAML is only needed for AsyncAPI documents and the overrides file, so it
+    is imported here rather than at module level.
+    """
+    import yaml
+    
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    try:
+        spec = yaml.load(data, Loader=loader)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Malformed YAML document: {e}")
+    if not isinstance(spec, dict):
+        raise ValueError("Malformed YAML document: expected a mapping at the top level")
+    return _json_keys(spec)
+
+
+def _json_key(key: Any) -> str:
+    return json.dumps(key) if key is None or isinstance(key, (bool, int, float)) else str(key)
+
+
+def _json_keys(node: Any) -> Any:
+    """Turn YAML mapping keys such as `200` or `true` into the strings JSON would use."""
+    if isinstance(node, dict):
+        return {
+            key if isinstance(key, str) else _json_key(key): _json_keys(value)
+            for key, value in node.items()
+        }
+    if isinstance(node, list):
+        return [_json_keys(value) for value in node]
+    return node
+
+
+def overlay_index_key(blob_sha: str, overrides_sha: Optional[str]) -> str:
+    """Endpoint index cache key of a spec blob with an optional overrides blob merged in."""
+    return f"{blob_sha}+{overrides_sha}" if overrides_sha else blob_sha
+
+
+def merge_overrides(base: Any, overrides: Any) -> Any:
+    """Deep-merge a Fern overrides node into a spec node, the way Fern applies it.
+    
+    Mappings merge key by key and lists of objects merge index by index. A
+    list of plain values such as `required` or `enum` replaces the base list,
+    a `null` override deletes the key and any other value replaces the base
+    one. Neither input is modified, and a LazySchemaMap stays lazy.
+    """
+    if isinstance(base, LazySchemaMap) and isinstance(overrides, Mapping):
+        return base.with_overrides(overrides)
+    if isinstance(base, Mapping) and isinstance(overrides, Mapping):
+        merged = dict(base)
+        for key, value in overrides.items():
+            if value is None:
+                merged.pop(key, None)
+            elif key in merged:
+                merged[key] = merge_overrides(merged[key], value)
+            else:
+                merged[key] = value
+        return merged
+    if isinstance(base, list) and isinstance(overrides, list) and overrides \
+            and all(isinstance(value, Mapping) for value in overrides):
+        merged = [merge_overrides(old, new) for old, new in zip(base, overrides)]
+        return merged + base[len(overrides):] + overrides[len(base):]
+    return overrides
+
+
+def existing_path_overrides(paths: Mapping, path_overrides: Mapping) -> Dict:
+    """Keep only the overrides of paths and operations that the base spec has.
+    
+    The overrides file outlives paths removed from the spec; merging its
+    entries for them would add operations with no request, responses or
+    `operationId` instead of reporting the paths as removed.
+    """
+    kept = {}
+    for path, item in path_overrides.items():
+        base_item = paths.get(path)
+        if not isinstance(base_item, Mapping):
+            continue
+        if isinstance(item, Mapping):
+            item = {key: value for key, value in item.items() if key not in HTTP_METHODS or key in base_item}
+        kept[path] = item
+    return kept
+
+
+class SpecIndexCache:
+    """On-disk LRU cache of flattened endpoint indexes, keyed by spec blob SHA."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.v{INDEX_CACHE_VERSION}.pickle"
+
+    @PROFILE.timed("cache_read")
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for a key, or None on a miss."""
+        entry = self._entry_path(key)
+        try:
+            with open(entry, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            PROFILE.count("index_cache_misses")
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            print(f"Ignoring unreadable cache entry {entry}: {e}")
+            PROFILE.count("index_cache_misses")
+            return None
+        # Touch the entry so eviction treats it as recently used
+        os.utime(entry)
+        PROFILE.count("index_cache_hits")
+        return value
+
+    @PROFILE.timed("cache_write")
+    def put(self, key: str, value: Any) -> None:
+        """Store a value, then evict least recently used entries over the size bound."""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._entry_path(key))
+        except OSError as e:
+            print(f"Could not write cache entry for {key}: {e}")
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for entry in self.cache_dir.glob("*.pickle"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+                total -= size
+            except OSError:
+                pass
+
+
+def default_cache_dir() -> Path:
+    """Root directory for the differ's on-disk caches."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(Path.home(), ".cache")
+    return Path(cache_home) / "elevenlabs-docs" / "openapi-diff"
+
+
+class GitObjectReader:
+    """Reads git objects through long-lived `git cat-file --batch` processes.
+    
+    One process serves object contents and another (`--batch-check`) object
+    SHAs, so resolving and reading many revisions costs no per-revision
+    process startup. Both are started on first use.
+    """
+
+    def __init__(self, repo_dir: Optional[str] = None):
+        self.repo_dir = repo_dir
+        self._batch: Optional[subprocess.Popen] = None
+        self._batch_check: Optional[subprocess.Popen] = None
+
+    def _start(self, mode: str) -> subprocess.Popen:
+        PROFILE.count("git_processes")
+        return subprocess.Popen(
+            ["git", "cat-file", mode], cwd=self.repo_dir,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+
+    def _request(self, process: subprocess.Popen, object_name: str) -> Optional[List[str]]:
+        process.stdin.write(object_name.encode() + b"\n")
+        process.stdin.flush()
+        header = process.stdout.readline().decode().split()
+        if len(header) != 3:
+            # "<name> missing" or "<name> ambiguous"
+            return None
+        return header
+
+    @PROFILE.timed("git")
+    def object_sha(self, object_name: str) -> Optional[str]:
+        """Resolve an object name such as `<commit>:<path>` to its SHA without reading it."""
+        if self._batch_check is None:
+            self._batch_check = self._start("--batch-check")
+        header = self._request(self._batch_check, object_name)
+        return header[0] if header else None
+
+    @PROFILE.timed("git")
+    def read(self, object_name: str, chunk_size: int = 1 << 16) -> Optional[bytes]:
+        """Stream the content of an object, or return None if it does not exist."""
+        if self._batch is None:
+            self._batch = self._start("--batch")
+        header = self._request(self._batch, object_name)
+        if not header:
+            return None
+        
+        remaining = int(header[2])
+        buffer = bytearray()
+        while remaining:
+            chunk = self._batch.stdout.read(min(chunk_size, remaining))
+            if not chunk:
+                raise EOFError(f"git cat-file exited while reading {object_name}")
+            buffer += chunk
+            remaining -= len(chunk)
+        # Each object is followed by a newline
+        self._batch.stdout.read(1)
+        PROFILE.count("bytes_read", len(buffer))
+        return bytes(buffer)
+
+    def close(self) -> None:
+        for process in (self._batch, self._batch_check):
+            if process is not None:
+                process.stdin.close()
+                process.wait()
+                process.stdout.close()
+        self._batch = self._batch_check = None
+
+    def __enter__(self) -> "GitObjectReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SpecSource(ABC):
+    """One revision of an OpenAPI spec, identified by the git blob SHA of its content.
+    
+    `locate` is cheap where the source allows it, so a cached endpoint index
+    can be used without ever calling `read`.
+    """
+
+    @abstractmethod
+    def describe(self) -> str:
+        """Human-readable name of the source for messages and reports."""
+
+    @abstractmethod
+    def locate(self) -> Optional[str]:
+        """Return the git blob SHA of the spec content, or None if it is unavailable."""
+
+    @abstractmethod
+    def read(self) -> Optional[bytes]:
+        """Return the raw spec document."""
+
+    def provenance(self) -> Tuple[Optional[str], str]:
+        """Return a resolved id of this revision and its date (YYYY-MM-DD) for recorded change rows.
+        
+        By default that is the blob SHA of the content, dated the day it is read.
+        """
+        return self.locate(), datetime.now().strftime("%Y-%m-%d")
+
+    def load(self) -> Optional[Dict]:
+        """Read the spec and load the parts the differ needs."""
+        data = self.read()
+        if data is None:
+            return None
+        try:
+            return load_spec_lazily(data)
+        except json.JSONDecodeError as e:
+            print(f"Error parsing OpenAPI spec from {self.describe()}: {e}")
+            return None
+
+
+class GitRevisionSource(SpecSource):
+    """A spec file as of a git revision."""
+
+    def __init__(self, revision: str, file_path: str, reader: Optional[GitObjectReader] = None):
+        self.revision = revision
+        self.file_path = file_path
+        self.reader = reader or GitObjectReader()
+        self.blob_sha: Optional[str] = None
+
+    def describe(self) -> str:
+        return f"git {self.revision}:{self.file_path}"
+
+    def locate(self) -> Optional[str]:
+        if self.blob_sha is None:
+            self.blob_sha = self.reader.object_sha(f"{self.revision}:{self.file_path}")
+            if self.blob_sha is None:
+                print(f"Error resolving {self.file_path} at {self.revision}")
+        return self.blob_sha
+
+    def read(self) -> Optional[bytes]:
+        blob_sha = self.locate()
+        if blob_sha is None:
+            return None
+        data = self.reader.read(blob_sha)
+        if data is None:
+            print(f"Error reading blob {blob_sha}")
+        return data
+
+    def provenance(self) -> Tuple[Optional[str], str]:
+        """The commit SHA the revision resolves to, dated by its commit time."""
+        commit_sha = self.reader.object_sha(f"{self.revision}^{{commit}}")
+        commit = self.reader.read(commit_sha) if commit_sha else None
+        if commit is None:
+            return super().provenance()
+        for line in commit.decode(errors="replace").splitlines():
+            if line.startswith("committer "):
+                # committer <name> <email> <timestamp> <timezone>
+                timestamp = int(line.rsplit(" ", 2)[1])
+                return commit_sha, datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
+        return commit_sha, datetime.now().strftime("%Y-%m-%d")
+
+
+class LocalFileSource(SpecSource):
+    """A spec file on disk."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data: Optional[bytes] = None
+
+    def describe(self) -> str:
+        return self.path
+
+    def locate(self) -> Optional[str]:
+        data = self.read()
+        return git_blob_sha(data) if data is not None else None
+
+    def read(self) -> Optional[bytes]:
+        if self.data is None:
+            try:
+                with open(self.path, "rb") as f:
+                    self.data = read_stream(f)
+            except OSError as e:
+                print(f"Error reading OpenAPI spec {self.path}: {e}")
+                return None
+        return self.data
+
+    def stamp(self) -> Optional[Tuple[int, int]]:
+        """Modification time and size of the file, to notice edits without reading it."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+class HttpConnectionPool:
+    """Keep-alive HTTP(S) connections, one per host, shared by the sources fetching from it.
+
+    Requests to one host take turns on its connection; requests to different
+    hosts can run concurrently from separate threads.
+    """
+
+    def __init__(self, timeout: float = 60):
+        self.timeout = timeout
+        self.connections: Dict[Tuple[str, str], http.client.HTTPConnection] = {}
+        self.host_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self.lock = threading.Lock()
+
+    def connect(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        PROFILE.count("http_connections")
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(netloc, timeout=self.timeout)
+
+    def get(self, url: str, headers: Dict[str, str], redirects: int = 5) -> Tuple[int, Any, bytes]:
+        """GET a URL, following redirects; returns the status, headers and body."""
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        with self.lock:
+            host_lock = self.host_locks.setdefault(key, threading.Lock())
+        
+        with host_lock:
+            connection = self.connections.pop(key, None)
+            reused = connection is not None
+            while True:
+                if connection is None:
+                    connection = self.connect(*key)
+                try:
+                    connection.request("GET", target, headers=headers)
+                    response = connection.getresponse()
+                    body = read_stream(response)
+                    break
+                except ConnectionError:
+                    connection.close()
+                    connection = None
+                    # The server may have closed a kept-alive connection in the meantime; retry once on a fresh one
+                    if not reused:
+                        raise
+                    reused = False
+            if reused:
+                PROFILE.count("http_connections_reused")
+            if response.will_close:
+                connection.close()
+            else:
+                self.connections[key] = connection
+        
+        location = response.headers.get("Location")
+        if response.status in (301, 302, 303, 307, 308) and location and redirects:
+            return self.get(urllib.parse.urljoin(url, location), headers, redirects - 1)
+        return response.status, response.headers, body
+
+    def close(self) -> None:
+        with self.lock:
+            for connection in self.connections.values():
+                connection.close()
+            self.connections.clear()
+
+
+class HttpSpecSource(SpecSource):
+    """A spec served over HTTP, revalidated with ETag / Last-Modified against an on-disk copy.
+    
+    When the server answers 304 Not Modified, the blob SHA is taken from the
+    stored copy, so an unchanged spec is neither downloaded nor parsed.
+    With `connections`, requests go through that pool's kept-alive
+    connections instead of a new connection each.
+    """
+
+    def __init__(self, url: str, cache_dir: Optional[Path] = None, offline: bool = False, timeout: float = 60,
+                 connections: Optional[HttpConnectionPool] = None):
+        self.url = url
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.offline = offline
+        self.timeout = timeout
+        self.connections = connections
+        self.data: Optional[bytes] = None
+        self.blob_sha: Optional[str] = None
+
+    def describe(self) -> str:
+        return self.url
+
+    def _cache_paths(self) -> Tuple[Path, Path]:
+        key = hashlib.sha1(self.url.encode()).hexdigest()
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def _load_metadata(self) -> Dict:
+        if not self.cache_dir:
+            return {}
+        meta_path, body_path = self._cache_paths()
+        try:
+            with open(meta_path) as f:
+                metadata = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return metadata if body_path.exists() else {}
+
+    def _store(self, data: bytes, headers) -> None:
+        if not self.cache_dir:
+            return
+        meta_path, body_path = self._cache_paths()
+        metadata = {
+            "url": self.url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "blob_sha": self.blob_sha,
+        }
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for path, content in ((body_path, data), (meta_path, json.dumps(metadata).encode())):
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not cache {self.url}: {e}")
+
+    @PROFILE.timed("fetch")
+    def locate(self) -> Optional[str]:
+        if self.blob_sha is not None:
+            return self.blob_sha
+        
+        metadata = self._load_metadata()
+        if self.offline:
+            if not metadata:
+                print(f"No cached copy of {self.url} available offline")
+                return None
+            self.blob_sha = metadata["blob_sha"]
+            return self.blob_sha
+        
+        request_headers = {}
+        if metadata.get("etag"):
+            request_headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("last_modified"):
+            request_headers["If-Modified-Since"] = metadata["last_modified"]
+        
+        try:
+            status, headers, data = self._fetch(request_headers)
+        except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+            print(f"Error fetching {self.url}: {e}")
+            return None
+        if status == 304 and metadata:
+            PROFILE.count("http_not_modified")
+            self.blob_sha = metadata["blob_sha"]
+            return self.blob_sha
+        if status != 200:
+            print(f"Error fetching {self.url}: HTTP {status}")
+            return None
+        
+        PROFILE.count("http_downloads")
+        self.data = data
+        self.blob_sha = git_blob_sha(data)
+        self._store(data, headers)
+        return self.blob_sha
+
+    def _fetch(self, headers: Dict[str, str]) -> Tuple[int, Any, Optional[bytes]]:
+        if self.connections is not None:
+            return self.connections.get(self.url, headers)
+        request = urllib.request.Request(self.url, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.headers, read_stream(response)
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, None
+
+    def read(self) -> Optional[bytes]:
+        if self.data is None:
+            if self.locate() is None:
+                return None
+        if self.data is None and self.cache_dir:
+            try:
+                with open(self._cache_paths()[1], "rb") as f:
+                    self.data = read_stream(f)
+            except OSError as e:
+                print(f"Error reading cached copy of {self.url}: {e}")
+        return self.data
+
+
+async def locate_concurrently(sources: List[SpecSource]) -> List[Optional[str]]:
+    """Locate many spec sources at once, each in its own thread; returns their blob SHAs in order."""
+    return list(await asyncio.gather(*(asyncio.to_thread(source.locate) for source in sources)))
+
+
+class FieldRecord:
+    """One flattened schema field, stored compactly.
+    
+    Type and format strings are interned, equal enum lists share one tuple
+    and frozenset, and `description` / `items` reference the spec's own
+    objects instead of copies. `to_dict` gives the legacy dict form used in
+    reports.
+    
+    `owner` is the component schema whose properties declare the field and
+    `name` its path within that schema, or None for fields declared inline
+    in an operation. `source` is the component schema a `$ref` field points
+    at, which its type, enum and constraints come from.
+    """
+
+    __slots__ = ("type", "required", "nullable", "description", "format", "enum", "enum_values", "items",
+                 "constraints", "default", "owner", "name", "source")
+
+    def __init__(self, type: Any, required: bool, nullable: bool, description: str,
+                 format: Optional[str], enum: Optional[Tuple], enum_values: Optional[frozenset], items: Any,
+                 constraints: Optional[Dict[str, Any]] = None, default: Any = None, owner: Optional[str] = None,
+                 name: Optional[str] = None, source: Optional[str] = None):
+        self.type = type
+        self.required = required
+        self.nullable = nullable
+        self.description = description
+        self.format = format
+        self.enum = enum
+        self.enum_values = enum_values
+        self.items = items
+        # Only the validation keywords present on the schema, or None
+        self.constraints = constraints
+        self.default = default
+        self.owner = owner
+        self.name = name
+        self.source = source
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": self.type,
+            "required": self.required,
+            "nullable": self.nullable,
+            "description": self.description,
+            "format": self.format,
+            "enum": list(self.enum) if self.enum is not None else None,
+            "items": self.items,
+        }
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class SchemaResolver:
+    """Resolves local `$ref` pointers and memoizes flattened component schemas for one spec."""
+
+    def __init__(self, spec: Dict):
+        self.spec = spec
+        # Flattened fields of a component schema, keyed by (ref, path prefix)
+        self.field_cache: Dict[Tuple[str, str], Dict[str, "FieldRecord"]] = {}
+        # Content fingerprints of component schemas, keyed by ref
+        self.ref_fingerprints: Dict[str, str] = {}
+        # Refs currently being expanded, used to detect cycles
+        self.ref_stack: List[str] = []
+        # Shallowest stack depth at which a cycle was cut during expansion
+        self.cycle_floor = sys.maxsize
+
+    def resolve(self, ref: str) -> Optional[Dict]:
+        """Look up a local JSON pointer such as `#/components/schemas/Model`."""
+        PROFILE.count("refs_resolved")
+        if not ref.startswith("#/"):
+            return None
+        node: Any = self.spec
+        for part in ref[2:].split("/"):
+            part = part.replace("~1", "/").replace("~0", "~")
+            if not isinstance(node, Mapping) or part not in node:
+                return None
+            node = node[part]
+        return node if isinstance(node, Mapping) else None
+
+    def deref(self, schema: Dict) -> Dict:
+        """Follow a chain of `$ref`s to the schema it points at."""
+        seen = set()
+        while isinstance(schema, dict) and "$ref" in schema and schema["$ref"] not in seen:
+            seen.add(schema["$ref"])
+            target = self.resolve(schema["$ref"])
+            if target is None:
+                break
+            schema = target
+        return schema
+
+    def memoize(self, cache: Dict, key: Any, ref: str, compute) -> Tuple[Any, bool]:
+        """Expand a ref once via `compute(target)`, cutting reference cycles.
+        
+        Returns the value and whether it is independent of the refs currently
+        being expanded, i.e. whether it is safe to cache. A cycle back into a
+        ref that is still being expanded yields `None`.
+        """
+        if key in cache:
+            PROFILE.count("ref_memo_hits")
+            return cache[key], True
+        
+        if ref in self.ref_stack:
+            self.cycle_floor = min(self.cycle_floor, self.ref_stack.index(ref))
+            return None, False
+        
+        depth = len(self.ref_stack)
+        self.ref_stack.append(ref)
+        try:
+            value = compute(self.resolve(ref) or {})
+        finally:
+            self.ref_stack.pop()
+        
+        # Only cuts at this ref or below keep the result context-free
+        cacheable = self.cycle_floor >= depth
+        if cacheable:
+            self.cycle_floor = sys.maxsize
+            cache[key] = value
+        return value, cacheable
+
+    def subset(self, path_names: List[str]) -> Dict:
+        """Copy of the spec holding only the given paths and the refs they reach, transitively.
+        
+        This is all a worker needs to flatten those paths, so the rest of the
+        spec never has to be decoded or pickled.
+        """
+        paths = self.spec.get("paths", {})
+        subset: Dict[str, Any] = {"paths": {name: paths[name] for name in path_names if name in paths}}
+        if "openapi" in self.spec:
+            subset["openapi"] = self.spec["openapi"]
+        
+        seen = set()
+        pending: List[Any] = [subset["paths"]]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, dict):
+                ref = node.get("$ref")
+                if isinstance(ref, str) and ref not in seen:
+                    seen.add(ref)
+                    target = self.resolve(ref)
+                    if target is not None:
+                        self._set_pointer(subset, ref, target)
+                        pending.append(target)
+                pending.extend(node.values())
+            elif isinstance(node, list):
+                pending.extend(node)
+        return subset
+    
+    def _set_pointer(self, document: Dict, ref: str, value: Any) -> None:
+        *parents, leaf = [part.replace("~1", "/").replace("~0", "~") for part in ref[2:].split("/")]
+        for part in parents:
+            document = document.setdefault(part, {})
+        document[leaf] = value
+    
+    def fingerprint(self, node: Any) -> str:
+        """Content hash of a spec subtree, with `$ref`s replaced by their targets' hashes."""
+        canonical = json.dumps(self._merkle(node), sort_keys=True, separators=(",", ":"))
+        return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+    def ref_fingerprint(self, ref: str) -> str:
+        """Content hash of a referenced schema, computed once per ref."""
+        value, _ = self.memoize(self.ref_fingerprints, ref, ref, self.fingerprint)
+        return value if value is not None else f"cycle:{ref}"
+
+    def _merkle(self, node: Any) -> Any:
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return {**node, "$ref": self.ref_fingerprint(node["$ref"])}
+            return {key: self._merkle(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [self._merkle(value) for value in node]
+        return node
+
+
+def _schema_name(ref: str) -> str:
+    """Display name of a component schema pointer, e.g. `Model` for `#/components/schemas/Model`."""
+    prefix = "#/components/schemas/"
+    return ref[len(prefix):].replace("~1", "/").replace("~0", "~") if ref.startswith(prefix) else ref
+
+
+def _mount_prefix(field_path: str, name: str) -> str:
+    """The path a schema is mounted at, given the full path of its field `name`."""
+    return field_path[:len(field_path) - len(name)].rstrip(".") if name else field_path
+
+
+def _join_field_path(prefix: str, field_path: str) -> str:
+    """Path of a field of a schema mounted at `prefix`, joined the way flattening joins them."""
+    if not prefix or not field_path:
+        return prefix or field_path
+    return f"{prefix}{'' if field_path.startswith('[]') else '.'}{field_path}"
+
+
+class SharedSchemaChanges:
+    """Field changes attributed to the component schemas that declare them, across all endpoints.
+
+    Endpoints that reach a schema share its flattened records, so each
+    (schema, field) pair is compared once, and every endpoint only records
+    the paths it mounts the schema at. Type, enum and constraint changes of
+    a `$ref` field belong to the schema it points at, and are reported once
+    on that schema's root as the field "".
+    """
+
     def __init__(self):
+        # Field changes keyed by schema name, then change kind, as compare_field_sets returns them
+        self.changes: Dict[str, Dict[str, List]] = {}
+        # Whether each (schema, field) pair compared so far changed its owner's or its $ref target's part
+        self.compared: Dict[Tuple[str, str], Tuple[bool, bool]] = {}
+        self.attributed = set()
+
+    def schema_changes(self, name: str) -> Dict[str, List]:
+        if name not in self.changes:
+            self.changes[name] = {kind: [] for kind in FIELD_CHANGE_KINDS}
+        return self.changes[name]
+
+    def mount(self, mounts: Dict[str, Dict[str, None]], ref: str, field_path: str, name: str) -> None:
+        """Record that the schema `ref` is reached at the path where `field_path` is its field `name`."""
+        mounts.setdefault(_schema_name(ref), {})[_mount_prefix(field_path, name)] = None
+
+    def add(self, kind: str, field_path: str, record: FieldRecord, mounts: Dict[str, Dict[str, None]]) -> None:
+        """Attribute a field added to or removed from a schema."""
+        self.mount(mounts, record.owner, field_path, record.name)
+        if (record.owner, record.name, kind) not in self.attributed:
+            self.attributed.add((record.owner, record.name, kind))
+            self.schema_changes(_schema_name(record.owner))[kind].append({
+                "field": record.name,
+                "details": record.to_dict()
+            })
+
+    def compare(self, differ: "OpenAPIFieldDiff", field_path: str, old_field: FieldRecord, new_field: FieldRecord,
+                mounts: Dict[str, Dict[str, None]]) -> None:
+        """Attribute the differences between two versions of a schema's field."""
+        source = old_field.source if old_field.source == new_field.source else None
+        key = (old_field.owner, old_field.name)
+        if key not in self.compared:
+            record_changes = {kind: [] for kind in FIELD_CHANGE_KINDS}
+            differ.compare_field_records(old_field.name, old_field, new_field, record_changes)
+            # Whether a field is required is up to the schema declaring it; the rest comes from the $ref target
+            owner_changed = source_changed = False
+            for kind, changes in record_changes.items():
+                for change in changes:
+                    if source is None or kind == "required_changed":
+                        self.schema_changes(_schema_name(old_field.owner))[kind].append(change)
+                        owner_changed = True
+                    else:
+                        if (source, "") not in self.attributed:
+                            self.schema_changes(_schema_name(source))[kind].append({**change, "field": ""})
+                        source_changed = True
+            if source_changed:
+                self.attributed.add((source, ""))
+            self.compared[key] = (owner_changed, source_changed)
+
+        owner_changed, source_changed = self.compared[key]
+        if owner_changed:
+            self.mount(mounts, old_field.owner, field_path, old_field.name)
+        if source_changed:
+            self.mount(mounts, source, field_path, "")
+
+
+def _use_direction(use: Dict[str, Any]) -> str:
+    """Whether a schema use recorded by compare_endpoint_indexes is on the request or the response side."""
+    return "request" if use["location"] == "request_body" else "response"
+
+
+def _content_hash(node: Any) -> str:
+    canonical = json.dumps(node, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def _component_ref(ref: str) -> Optional[str]:
+    """The `#/components/SECTION/NAME` pointer a local `$ref` points into, if any."""
+    parts = ref.split("/", 4)
+    if len(parts) < 4 or parts[:2] != ["#", "components"]:
+        return None
+    return "/".join(parts[:4])
+
+
+def _direct_refs(node: Any) -> List[str]:
+    """Components referenced anywhere within `node`, without following the references."""
+    refs = []
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, Mapping):
+            ref = node.get("$ref")
+            if isinstance(ref, str) and _component_ref(ref):
+                refs.append(_component_ref(ref))
+            pending.extend(node.values())
+        elif isinstance(node, list):
+            pending.extend(node)
+    return refs
+
+
+def reachable_refs(resolver: SchemaResolver, node: Any, edges: Dict[str, List[str]]) -> frozenset:
+    """Components `node` reaches through `$ref`s, transitively.
+    
+    `edges` caches the direct references of each component visited, so it
+    can be shared across calls on the same spec.
+    """
+    reached = set()
+    pending = _direct_refs(node)
+    while pending:
+        ref = pending.pop()
+        if ref in reached:
+            continue
+        reached.add(ref)
+        if ref not in edges:
+            edges[ref] = _direct_refs(resolver.resolve(ref) or {})
+        pending.extend(edges[ref])
+    return frozenset(reached)
+
+
+def schema_usage(resolver: SchemaResolver, entries: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Reverse index from every component schema to the entries that reach it, in entry order.
+    
+    `entries` maps names (operations or channels) to the spec nodes they
+    cover. References are followed wherever they appear, so schemas reached
+    through `allOf`, `anyOf`, `oneOf`, properties, items or other components
+    such as parameters, responses and messages all count. Schemas nothing
+    reaches map to an empty list.
+    """
+    usage = {name: [] for name in resolver.spec.get("components", {}).get("schemas") or {}}
+    edges: Dict[str, List[str]] = {}
+    for entry, node in entries.items():
+        for ref in reachable_refs(resolver, node, edges):
+            if ref.startswith("#/components/schemas/"):
+                usage.setdefault(_schema_name(ref), []).append(entry)
+    return usage
+
+
+def component_hashes(spec: Dict) -> Dict[str, str]:
+    """Content hash of every component of a spec, keyed by its `$ref` pointer."""
+    hashes = {}
+    for section, entries in spec.get("components", {}).items():
+        if not isinstance(entries, Mapping):
+            continue
+        if isinstance(entries, LazySchemaMap):
+            section_hashes = entries.content_hashes()
+        else:
+            section_hashes = {name: _content_hash(value) for name, value in entries.items()}
+        for name, digest in section_hashes.items():
+            hashes[f"#/components/{section}/{name.replace('~', '~0').replace('/', '~1')}"] = digest
+    return hashes
+
+
+class IncrementalEndpointIndex:
+    """Endpoint index of a spec under edit, re-flattened only where it changed.
+
+    Each path item and component is hashed as of the last update, and the
+    components each path reaches through `$ref`s are remembered. An update
+    re-flattens only the paths whose own item or reachable components
+    changed, and keeps every other endpoint as it was.
+    """
+
+    def __init__(self, differ: "OpenAPIFieldDiff"):
+        self.differ = differ
+        self.endpoints: Dict[str, Dict] = {}
+        self.path_hashes: Dict[str, str] = {}
+        self.ref_hashes: Dict[str, str] = {}
+        # Components referenced directly by each component
+        self.ref_edges: Dict[str, List[str]] = {}
+        # Components each path reaches, transitively
+        self.path_refs: Dict[str, frozenset] = {}
+
+    def update(self, spec: Dict) -> List[str]:
+        """Re-index a new revision of the spec; returns the paths that were re-flattened."""
+        paths = spec.get("paths", {})
+        path_hashes = {name: _content_hash(item) for name, item in paths.items()}
+        ref_hashes = component_hashes(spec)
+        changed_refs = {ref for ref in ref_hashes.keys() | self.ref_hashes.keys()
+                        if ref_hashes.get(ref) != self.ref_hashes.get(ref)}
+        for ref in changed_refs:
+            self.ref_edges.pop(ref, None)
+
+        dirty = [
+            name for name in dict.fromkeys([*self.path_hashes, *paths])
+            if path_hashes.get(name) != self.path_hashes.get(name)
+            or not self.path_refs.get(name, frozenset()).isdisjoint(changed_refs)
+        ]
+        resolver = SchemaResolver(spec)
+        for name in dirty:
+            if name in paths:
+                self.path_refs[name] = reachable_refs(resolver, paths[name], self.ref_edges)
+            else:
+                self.path_refs.pop(name, None)
+
+        dirty_paths = set(dirty)
+        kept = {endpoint: info for endpoint, info in self.endpoints.items()
+                if endpoint.split(" ", 1)[1] not in dirty_paths}
+        fresh = self.differ.get_endpoint_schemas({**spec, "paths": {name: paths[name] for name in dirty if name in paths}})
+        self.endpoints = self.differ.merge_chunk_indexes(spec, [kept, fresh])
+        self.path_hashes = path_hashes
+        self.ref_hashes = ref_hashes
+        return dirty
+
+
+def parse_interval(value: str) -> timedelta:
+    """Parse an interval such as `7d`, `2w` or `12h`."""
+    units = {"h": "hours", "d": "days", "w": "weeks"}
+    try:
+        amount = int(value[:-1])
+        unit = units[value[-1]]
+    except (ValueError, KeyError, IndexError):
+        raise argparse.ArgumentTypeError(f"Invalid interval '{value}', expected e.g. 7d, 2w or 12h")
+    if amount <= 0:
+        raise argparse.ArgumentTypeError(f"Interval must be positive: '{value}'")
+    return timedelta(**{unit: amount})
+
+
+def parse_jobs(value: str) -> int:
+    """Parse a worker process count, which must be at least 1."""
+    try:
+        jobs = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid number of jobs '{value}'")
+    if jobs < 1:
+        raise argparse.ArgumentTypeError(f"Number of jobs must be at least 1: '{value}'")
+    return jobs
+
+
+def parse_date_range(value: str) -> str:
+    """Check a `FROM..TO` date range, where TO defaults to today and may not be before FROM."""
+    from_date, _, to_date = value.partition("..")
+    try:
+        start = datetime.strptime(from_date, "%Y-%m-%d")
+        end = datetime.strptime(to_date, "%Y-%m-%d") if to_date else datetime.now()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid range '{value}', expected YYYY-MM-DD..YYYY-MM-DD")
+    if start > end:
+        raise argparse.ArgumentTypeError(f"Invalid range '{value}': {from_date} is after {to_date or 'today'}")
+    return value
+
+
+# Per-process differs for pool workers, so each worker keeps one git reader
+_worker_differs: Dict[Tuple[Optional[str], Optional[int]], "OpenAPIFieldDiff"] = {}
+
+
+# Columns of one atomic change row, in output order
+CHANGE_ROW_COLUMNS = (
+    "from_key", "to_key", "from_revision", "to_revision", "from_date", "to_date", "recorded_at",
+    "endpoint", "location", "status_code", "media_type", "field", "change", "breaking", "details",
+)
+
+
+class ChangeRowWriter(ABC):
+    """Appends one row per atomic change, remembering which revision pairs are already recorded.
+    
+    Revisions are identified by their endpoint index cache key, i.e. the spec
+    blob SHA (plus the overrides blob SHA), so an interval diffed once never
+    needs to be diffed again.
+    """
+
+    @abstractmethod
+    def recorded(self, from_key: str, to_key: str) -> bool:
+        """Whether the interval between two index cache keys has already been recorded."""
+
+    @abstractmethod
+    def write(self, interval: Dict[str, Any], rows: List[Dict[str, Any]]) -> int:
+        """Record the change rows of one interval and return how many were written."""
+
+    def close(self) -> None:
+        pass
+
+
+class JsonLinesChangeWriter(ChangeRowWriter):
+    """Appends change rows to a JSON Lines file, or writes them to stdout.
+    
+    An interval without changes is written as one marker row whose change
+    columns are all null, so re-running over the same history skips it too.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.intervals = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        row = json.loads(line)
+                        self.intervals.add((row["from_key"], row["to_key"]))
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.stream = open(path, "a") if path else sys.stdout
+
+    def recorded(self, from_key: str, to_key: str) -> bool:
+        return (from_key, to_key) in self.intervals
+
+    def write(self, interval: Dict[str, Any], rows: List[Dict[str, Any]]) -> int:
+        for row in rows or [{}]:
+            record = {**interval, **row}
+            self.stream.write(json.dumps({column: record.get(column) for column in CHANGE_ROW_COLUMNS}) + "\n")
+        self.stream.flush()
+        self.intervals.add((interval["from_key"], interval["to_key"]))
+        return len(rows)
+
+    def close(self) -> None:
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+
+class SqliteChangeWriter(ChangeRowWriter):
+    """Appends change rows to a SQLite database indexed for history queries.
+    
+    Every recorded interval gets a row in `intervals`, including intervals
+    without changes, so re-running over the same history only diffs new ones.
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS intervals (
+                from_key TEXT NOT NULL, to_key TEXT NOT NULL,
+                from_revision TEXT, to_revision TEXT, from_date TEXT, to_date TEXT, recorded_at TEXT,
+                PRIMARY KEY (from_key, to_key)
+            );
+            CREATE TABLE IF NOT EXISTS changes (
+                from_key TEXT NOT NULL, to_key TEXT NOT NULL,
+                from_revision TEXT, to_revision TEXT, from_date TEXT, to_date TEXT, recorded_at TEXT,
+                endpoint TEXT NOT NULL, location TEXT NOT NULL, status_code TEXT, media_type TEXT,
+                field TEXT, change TEXT NOT NULL, breaking INTEGER NOT NULL, details TEXT
+            );
+            CREATE INDEX IF NOT EXISTS changes_by_endpoint ON changes (endpoint, to_date);
+            CREATE INDEX IF NOT EXISTS changes_by_date ON changes (to_date, breaking);
+            CREATE INDEX IF NOT EXISTS changes_by_interval ON changes (from_key, to_key);
+        """)
+
+    def recorded(self, from_key: str, to_key: str) -> bool:
+        cursor = self.db.execute("SELECT 1 FROM intervals WHERE from_key = ? AND to_key = ?", (from_key, to_key))
+        return cursor.fetchone() is not None
+
+    def write(self, interval: Dict[str, Any], rows: List[Dict[str, Any]]) -> int:
+        if self.recorded(interval["from_key"], interval["to_key"]):
+            return 0
+        interval_columns = CHANGE_ROW_COLUMNS[:7]
+        records = []
+        for row in rows:
+            record = {**interval, **row, "details": json.dumps(row.get("details"))}
+            records.append([record.get(column) for column in CHANGE_ROW_COLUMNS])
+        
+        with self.db:
+            self.db.execute(
+                f"INSERT INTO intervals ({', '.join(interval_columns)}) "
+                f"VALUES ({', '.join('?' for _ in interval_columns)})",
+                [interval.get(column) for column in interval_columns]
+            )
+            self.db.executemany(
+                f"INSERT INTO changes ({', '.join(CHANGE_ROW_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in CHANGE_ROW_COLUMNS)})",
+                records
+            )
+        return len(rows)
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def _timeline_worker_differ(cache_dir: Optional[str], cache_max_bytes: Optional[int]) -> "OpenAPIFieldDiff":
+    key = (cache_dir, cache_max_bytes)
+    if key not in _worker_differs:
+        cache = SpecIndexCache(cache_dir, cache_max_bytes) if cache_max_bytes else None
+        _worker_differs[key] = OpenAPIFieldDiff(cache)
+    return _worker_differs[key]
+
+
+def _build_index_worker(args: Tuple[Optional[str], Optional[int], str, Optional[str]]) -> Optional[Dict[str, Dict]]:
+    """Process pool entry point: load and flatten one spec blob, with an overrides blob merged in."""
+    cache_dir, cache_max_bytes, blob_sha, overrides_sha = args
+    differ = _timeline_worker_differ(cache_dir, cache_max_bytes)
+    return differ.load_overlaid_index(blob_sha, lambda: differ.read_git_blob(blob_sha),
+                                      overrides_sha, lambda: differ.git.read(overrides_sha))
+
+
+def _diff_paths_worker(args: Tuple[Dict, Dict]) -> Tuple[Dict[str, Dict], Dict[str, Dict], Dict]:
+    """Process pool entry point: flatten and diff the paths of two spec subsets."""
+    old_subset, new_subset = args
+    differ = OpenAPIFieldDiff()
+    old_endpoints = differ.get_endpoint_schemas(old_subset)
+    new_endpoints = differ.get_endpoint_schemas(new_subset)
+    return old_endpoints, new_endpoints, differ.compare_endpoint_indexes(old_endpoints, new_endpoints)
+
+
+def _compare_indexes_worker(args: Tuple[Dict[str, Dict], Dict[str, Dict]]) -> Dict:
+    """Process pool entry point: diff two flattened endpoint indexes."""
+    old_endpoints, new_endpoints = args
+    return OpenAPIFieldDiff().compare_endpoint_indexes(old_endpoints, new_endpoints)
+
+
+class OpenAPIFieldDiff:
+    def __init__(self, cache: Optional[SpecIndexCache] = None, base_url: str = DEFAULT_BASE_URL,
+                 http_cache_dir: Optional[Path] = None, offline: bool = False, apply_overrides: bool = True):
         self.openapi_path = "fern/apis/api/openapi.json"
+        self.overrides_path = "fern/apis/api/openapi-overrides.yml"
+        self.apply_overrides = apply_overrides
+        # Parsed overrides documents, keyed by blob SHA
+        self.overrides_specs: Dict[str, Dict] = {}
+        self.asyncapi_paths = ["fern/apis/api/asyncapi.yml", "fern/apis/convai/asyncapi.yml"]
+        self.resolver = SchemaResolver({})
+        self.cache = cache
+        self.git = GitObjectReader()
+        # Shared (tuple, frozenset) pairs for enum lists, keyed by their values
+        self.enum_table: Dict[Tuple, Tuple[Tuple, Optional[frozenset]]] = {}
+        self.base_url = base_url.rstrip("/")
+        self.http_cache_dir = http_cache_dir
+        self.offline = offline
         self.changes = {
             "new_endpoints": [],
             "removed_endpoints": [],
@@ -32,84 +1510,391 @@ class OpenAPIFieldDiff:
             "backward_compatible_changes": []
         }
     
-    def get_git_file_at_date(self, file_path: str, date: str) -> Optional[Dict]:
-        """Get the OpenAPI spec from git at a specific date."""
+    @PROFILE.timed("git")
+    def get_git_commits_at_dates(self, file_path: str, dates: List[str]) -> Dict[str, Optional[str]]:
+        """Find the latest commit touching a file before or on each date.
+        
+        All dates are answered from a single `git log` walk over the file's history.
+        """
+        results: Dict[str, Optional[str]] = {date: None for date in dates}
+        if not dates:
+            return results
         try:
-            # Find the latest commit before or on the specified date
-            cmd = [
-                "git", "log", "--until", f"{date} 23:59:59",
-                "--format=%H", "-n", "1", "--", file_path
-            ]
+            cmd = ["git", "log", "--format=%ct %H", "--", file_path]
+            PROFILE.count("git_processes")
             result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            commit_hash = result.stdout.strip()
-            
-            if not commit_hash:
+        except subprocess.CalledProcessError as e:
+            print(f"Error listing commits of {file_path}: {e}")
+            return results
+        
+        history = []
+        for line in result.stdout.splitlines():
+            timestamp, commit_hash = line.split()
+            history.append((int(timestamp), commit_hash))
+        # Oldest first; ties keep git's walk order, newest last
+        history.reverse()
+        history.sort(key=lambda entry: entry[0])
+        timestamps = [timestamp for timestamp, _ in history]
+        
+        for date in dates:
+            cutoff = datetime.strptime(f"{date} 23:59:59", "%Y-%m-%d %H:%M:%S").timestamp()
+            index = bisect.bisect_right(timestamps, cutoff)
+            if index:
+                results[date] = history[index - 1][1]
+            else:
                 print(f"No commit found for {file_path} before {date}")
+        return results
+    
+    def get_git_commit_at_date(self, file_path: str, date: str) -> Optional[str]:
+        """Find the latest commit touching a file before or on a date."""
+        return self.get_git_commits_at_dates(file_path, [date])[date]
+    
+    def get_git_blob_sha(self, commit_hash: str, file_path: str) -> Optional[str]:
+        """Get the blob SHA of a file at a commit without reading its content."""
+        blob_sha = self.git.object_sha(f"{commit_hash}:{file_path}")
+        if blob_sha is None:
+            print(f"Error resolving {file_path} at {commit_hash}")
+        return blob_sha
+    
+    def read_git_blob(self, blob_sha: str) -> Optional[Dict]:
+        """Stream a JSON spec blob out of git and load the parts the differ needs."""
+        try:
+            data = self.git.read(blob_sha)
+            if data is None:
+                print(f"Error reading blob {blob_sha}: not found")
                 return None
-            
-            # Get the file content at that commit
-            cmd = ["git", "show", f"{commit_hash}:{file_path}"]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            return json.loads(result.stdout)
-        except (subprocess.CalledProcessError, json.JSONDecodeError) as e:
-            print(f"Error getting file at date {date}: {e}")
+            return load_spec_lazily(data)
+        except json.JSONDecodeError as e:
+            print(f"Error reading blob {blob_sha}: {e}")
+            return None
+    
+    def get_git_file_at_date(self, file_path: str, date: str) -> Optional[Dict]:
+        """Get the OpenAPI spec from git at a specific date."""
+        commit_hash = self.get_git_commit_at_date(file_path, date)
+        if not commit_hash:
+            return None
+        blob_sha = self.get_git_blob_sha(commit_hash, file_path)
+        if not blob_sha:
             return None
+        return self.read_git_blob(blob_sha)
+    
+    def current_source(self) -> "HttpSpecSource":
+        """The live spec served by the configured API base URL."""
+        return HttpSpecSource(f"{self.base_url}/openapi.json", self.http_cache_dir, self.offline)
     
     def get_current_openapi(self) -> Optional[Dict]:
         """Get the current OpenAPI spec from the API."""
+        return self.current_source().load()
+    
+    def load_endpoint_index(self, blob_sha: str, load_spec, build_index=None) -> Optional[Dict[str, Dict]]:
+        """Get the flattened endpoint index for a spec blob, using the on-disk cache.
+        
+        `load_spec` is only called on a cache miss, so a known blob skips reading,
+        parsing and flattening the spec entirely. `build_index` defaults to
+        `get_endpoint_schemas`.
+        """
+        if self.cache:
+            endpoints = self.cache.get(blob_sha)
+            if endpoints is not None:
+                return endpoints
+        
+        spec = load_spec()
+        if not spec:
+            return None
+        endpoints = (build_index or self.get_endpoint_schemas)(spec)
+        
+        if self.cache:
+            self.cache.put(blob_sha, endpoints)
+        return endpoints
+    
+    def load_source_index(self, source: SpecSource) -> Optional[Dict[str, Dict]]:
+        """Get the flattened endpoint index of a spec source with its overrides applied, using the on-disk cache."""
+        located = self.locate_source(source)
+        if located is None:
+            return None
+        return self.load_endpoint_index(*located)
+    
+    def locate_source(self, source: SpecSource) -> Optional[Tuple[str, Any]]:
+        """Return the index cache key of a spec source and a loader for the spec with its overrides applied."""
+        blob_sha = source.locate()
+        if blob_sha is None:
+            return None
+        overrides = self.overrides_source(source)
+        if overrides is None:
+            return blob_sha, source.load
+        return self.overlaid_spec_loader(blob_sha, source.load, overrides.locate(), overrides.read)
+    
+    def overrides_enabled(self) -> bool:
+        """Whether the overrides file is merged into specs; without PyYAML it is not, with a warning."""
+        if not self.apply_overrides:
+            return False
         try:
-            cmd = ["curl", "-s", "https://api.elevenlabs.io/openapi.json"]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            return json.loads(result.stdout)
-        except (subprocess.CalledProcessError, json.JSONDecodeError) as e:
-            print(f"Error fetching current OpenAPI spec: {e}")
+            import yaml  # noqa: F401
+        except ImportError:
+            print(f"Warning: PyYAML is not installed, so {self.overrides_path} is not applied "
+                  "(pip install pyyaml, or pass --no-overrides to silence this)", file=sys.stderr)
+            self.apply_overrides = False
+        return self.apply_overrides
+    
+    def overrides_source(self, source: SpecSource) -> Optional[SpecSource]:
+        """The overrides file that applies to a spec source, if any.
+        
+        A git revision of the spec uses the overrides file from the same
+        revision; every other source uses the working tree copy. Without
+        PyYAML the raw spec is diffed, with a warning.
+        """
+        if not self.overrides_enabled():
             return None
+        if isinstance(source, GitRevisionSource):
+            # Revisions from before the overrides file existed have nothing to apply
+            overrides = GitRevisionSource(source.revision, self.overrides_path, self.git)
+            overrides.blob_sha = self.git.object_sha(f"{source.revision}:{self.overrides_path}")
+            return overrides if overrides.blob_sha else None
+        return LocalFileSource(self.overrides_path) if os.path.exists(self.overrides_path) else None
+    
+    def load_overlaid_index(self, blob_sha: str, load_spec, overrides_sha: Optional[str],
+                            read_overrides) -> Optional[Dict[str, Dict]]:
+        """Get the endpoint index of a spec blob with an overrides blob merged in.
+        
+        The index is cached per (spec blob, overrides blob) pair, so each pair
+        is merged and flattened once.
+        """
+        return self.load_endpoint_index(*self.overlaid_spec_loader(blob_sha, load_spec, overrides_sha, read_overrides))
     
-    def extract_schema_fields(self, schema: Dict, path: str = "") -> Dict[str, Dict]:
+    def overlaid_spec_loader(self, blob_sha: str, load_spec, overrides_sha: Optional[str],
+                             read_overrides) -> Tuple[str, Any]:
+        """Return the index cache key of a (spec blob, overrides blob) pair and a loader for the merged spec."""
+        if overrides_sha is None:
+            return blob_sha, load_spec
+        
+        def load_merged_spec() -> Optional[Dict]:
+            spec = load_spec()
+            overrides = self.get_overrides(overrides_sha, read_overrides)
+            if not spec or overrides is None:
+                return None
+            # Only the sections the differ reads need merging
+            with PROFILE.stage("merge_overrides"):
+                sections = {key: overrides[key] for key in SPEC_SECTIONS if key in overrides}
+                if isinstance(sections.get("paths"), Mapping):
+                    sections["paths"] = existing_path_overrides(spec.get("paths", {}), sections["paths"])
+                return merge_overrides(spec, sections)
+        
+        return overlay_index_key(blob_sha, overrides_sha), load_merged_spec
+    
+    def get_overrides(self, overrides_sha: str, read_overrides) -> Optional[Dict]:
+        """Parse an overrides document once per blob."""
+        if overrides_sha not in self.overrides_specs:
+            data = read_overrides()
+            if data is None:
+                return None
+            try:
+                self.overrides_specs[overrides_sha] = load_yaml_spec(data)
+            except ImportError:
+                print("Error: PyYAML is required to apply the OpenAPI overrides (pip install pyyaml, or pass --no-overrides)")
+                return None
+            except ValueError as e:
+                print(f"Error parsing OpenAPI overrides {overrides_sha}: {e}")
+                return None
+        return self.overrides_specs[overrides_sha]
+    
+    def configured_servers(self) -> Optional[List[Tuple[str, str]]]:
+        """The (name, base URL) of each server listed in the working tree overrides file, the default first."""
+        overrides_source = LocalFileSource(self.overrides_path)
+        overrides_sha = overrides_source.locate()
+        if overrides_sha is None:
+            print(f"Error: {self.overrides_path} not found")
+            return None
+        overrides = self.get_overrides(overrides_sha, overrides_source.read)
+        if overrides is None:
+            return None
+        return [
+            (server.get("x-fern-server-name") or server["url"], server["url"])
+            for server in overrides.get("servers") or [] if isinstance(server, Mapping) and server.get("url")
+        ]
+    
+    def load_asyncapi_source(self, source: SpecSource) -> Optional[Dict]:
+        """Read and parse an AsyncAPI document from a spec source."""
+        data = source.read()
+        if data is None:
+            return None
+        try:
+            return load_yaml_spec(data)
+        except ImportError:
+            print("Error: PyYAML is required to diff AsyncAPI documents (pip install pyyaml)")
+        except ValueError as e:
+            print(f"Error parsing AsyncAPI spec from {source.describe()}: {e}")
+        return None
+    
+    def load_channel_index(self, source: SpecSource) -> Optional[Dict[str, Dict]]:
+        """Get the flattened channel index of an AsyncAPI source, using the on-disk cache."""
+        blob_sha = source.locate()
+        if blob_sha is None:
+            return None
+        return self.load_endpoint_index(blob_sha, lambda: self.load_asyncapi_source(source),
+                                        self.get_channel_schemas)
+    
+    def load_schema_usage(self, source: SpecSource) -> Optional[Dict[str, List[str]]]:
+        """Get the reverse schema usage index of an OpenAPI source with its overrides applied, using the on-disk cache."""
+        located = self.locate_source(source)
+        if located is None:
+            return None
+        blob_key, load_spec = located
+        return self.load_endpoint_index(f"{blob_key}.usage", load_spec, self.get_schema_usage)
+    
+    def load_channel_schema_usage(self, source: SpecSource) -> Optional[Dict[str, List[str]]]:
+        """Get the reverse schema usage index of an AsyncAPI source, using the on-disk cache."""
+        blob_sha = source.locate()
+        if blob_sha is None:
+            return None
+        return self.load_endpoint_index(f"{blob_sha}.usage", lambda: self.load_asyncapi_source(source),
+                                        self.get_channel_schema_usage)
+    
+    @PROFILE.timed("git")
+    def get_revision_timeline(self, file_paths: List[str], until: float) -> List[Tuple[float, str]]:
+        """List (commit timestamp, commit) pairs touching any of the files up to a time, oldest first.
+        
+        Uses a single `git rev-list` walk over the files' history.
+        """
+        try:
+            cmd = ["git", "rev-list", "--timestamp", f"--until={int(until)}", "HEAD", "--", *file_paths]
+            PROFILE.count("git_processes")
+            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        except subprocess.CalledProcessError as e:
+            print(f"Error listing revisions of {', '.join(file_paths)}: {e}")
+            return []
+        
+        revisions = []
+        for line in result.stdout.splitlines():
+            timestamp, commit_hash = line.split()
+            revisions.append((float(timestamp), commit_hash))
+        revisions.sort()
+        return revisions
+    
+    def get_git_blob_shas(self, commit_hashes: List[str], file_path: str) -> Dict[str, str]:
+        """Resolve the blob SHA of a file at many commits through one git process."""
+        blob_shas = {}
+        for commit_hash in commit_hashes:
+            blob_sha = self.get_git_blob_sha(commit_hash, file_path)
+            if blob_sha:
+                blob_shas[commit_hash] = blob_sha
+        return blob_shas
+    
+    def parse_source(self, value: str, file_path: Optional[str] = None) -> SpecSource:
+        """Build a spec source from `api`, `git:REV`, `file:PATH`, an http(s) URL or a file path.
+        
+        `file_path` selects the spec file in the repository for `git:` sources
+        and defaults to the OpenAPI spec. AsyncAPI documents are not served by
+        the API, so for them `api` means the working tree copy.
+        """
+        if value == "api":
+            return LocalFileSource(file_path) if file_path else self.current_source()
+        if value.startswith("git:"):
+            return GitRevisionSource(value[len("git:"):], file_path or self.openapi_path, self.git)
+        if value.startswith(("http://", "https://")):
+            return HttpSpecSource(value, self.http_cache_dir, self.offline)
+        return LocalFileSource(value[len("file:"):] if value.startswith("file:") else value)
+    
+    def extract_schema_fields(self, schema: Dict, path: str = "") -> Dict[str, FieldRecord]:
         """Recursively extract all fields from a schema with their details."""
         fields = {}
         
         if not isinstance(schema, dict):
             return fields
         
+        # Shared component schemas are flattened once and reused
+        if "$ref" in schema:
+            return self.extract_ref_fields(schema["$ref"], path)
+        
         # Handle object properties
         if "properties" in schema:
+            PROFILE.count("fields_flattened", len(schema["properties"]))
             for prop_name, prop_schema in schema["properties"].items():
-                field_path = f"{path}.{prop_name}" if path else prop_name
-                field_info = {
-                    "type": prop_schema.get("type", "unknown"),
-                    "required": prop_name in schema.get("required", []),
-                    "nullable": prop_schema.get("nullable", False),
-                    "description": prop_schema.get("description", ""),
-                    "format": prop_schema.get("format"),
-                    "enum": prop_schema.get("enum"),
-                    "items": prop_schema.get("items"),
-                }
+                field_path = sys.intern(f"{path}.{prop_name}" if path else prop_name)
+                resolved = self.resolver.deref(prop_schema)
+                if not isinstance(resolved, Mapping):
+                    # Malformed, e.g. an override that replaced the schema with a list
+                    resolved = {}
+                enum, enum_values = self.intern_enum(resolved.get("enum"))
+                constraints = {key: resolved[key] for key in CONSTRAINT_KEYS if key in resolved}
+                source = prop_schema.get("$ref") if isinstance(prop_schema, dict) else None
+                field_info = FieldRecord(
+                    type=_intern(resolved.get("type", "unknown")),
+                    required=prop_name in schema.get("required", []),
+                    nullable=resolved.get("nullable", False),
+                    description=_intern(resolved.get("description", "")),
+                    format=_intern(resolved.get("format")),
+                    enum=enum,
+                    enum_values=enum_values,
+                    items=resolved.get("items"),
+                    constraints=constraints or None,
+                    default=resolved.get("default"),
+                    # Component schemas are flattened at their root, so paths are relative to the owner
+                    owner=self.resolver.ref_stack[-1] if self.resolver.ref_stack else None,
+                    name=field_path,
+                    source=source if isinstance(source, str) else None,
+                )
                 fields[field_path] = field_info
                 
-                # Recursively process nested objects
-                if prop_schema.get("type") == "object" or "properties" in prop_schema:
-                    nested_fields = self.extract_schema_fields(prop_schema, field_path)
-                    fields.update(nested_fields)
+                # Recursively process nested objects, including referenced and combined schemas
+                nested_fields = self.extract_schema_fields(prop_schema, field_path)
+                fields.update(nested_fields)
         
         # Handle array items
         if "items" in schema and isinstance(schema["items"], dict):
             nested_fields = self.extract_schema_fields(schema["items"], f"{path}[]")
             fields.update(nested_fields)
         
-        # Handle allOf, anyOf, oneOf
-        for combine_key in ["allOf", "anyOf", "oneOf"]:
-            if combine_key in schema:
-                for sub_schema in schema[combine_key]:
-                    nested_fields = self.extract_schema_fields(sub_schema, path)
-                    fields.update(nested_fields)
+        # Handle allOf, anyOf, oneOf
+        for combine_key in ["allOf", "anyOf", "oneOf"]:
+            if combine_key in schema:
+                for sub_schema in schema[combine_key]:
+                    nested_fields = self.extract_schema_fields(sub_schema, path)
+                    fields.update(nested_fields)
+        
+        return fields
+    
+    def intern_enum(self, values: Optional[List]) -> Tuple[Optional[Tuple], Optional[frozenset]]:
+        """Return a shared tuple and frozenset for an enum list."""
+        if values is None:
+            return None, None
+        key = tuple(values)
+        try:
+            return self.enum_table.setdefault(key, (key, frozenset(key)))
+        except TypeError:
+            # Unhashable enum values (e.g. objects) cannot be shared or set-compared
+            return key, None
+    
+    def extract_ref_fields(self, ref: str, path: str = "") -> Dict[str, FieldRecord]:
+        """Extract the fields of a referenced schema, reusing earlier flattenings."""
+        cached = self.resolver.field_cache.get((ref, path))
+        if cached is not None:
+            return cached
+        
+        base_fields, cacheable = self.flatten_ref(ref)
+        if not path:
+            return base_fields
+        
+        fields = {}
+        for field_path, field_info in base_fields.items():
+            separator = "" if field_path.startswith("[]") else "."
+            fields[sys.intern(f"{path}{separator}{field_path}")] = field_info
         
+        if cacheable:
+            self.resolver.field_cache[(ref, path)] = fields
         return fields
     
+    def flatten_ref(self, ref: str) -> Tuple[Dict[str, FieldRecord], bool]:
+        """Flatten a referenced schema at the root path, cutting reference cycles."""
+        fields, cacheable = self.resolver.memoize(
+            self.resolver.field_cache, (ref, ""), ref, self.extract_schema_fields
+        )
+        return fields or {}, cacheable
+    
+    @PROFILE.timed("flatten")
     def get_endpoint_schemas(self, spec: Dict) -> Dict[str, Dict]:
         """Extract all endpoint schemas with their request/response fields."""
         endpoints = {}
+        self.resolver = SchemaResolver(spec)
         
         if "paths" not in spec:
             return endpoints
@@ -118,6 +1903,9 @@ class OpenAPIFieldDiff:
             for method, operation in path_obj.items():
                 if method.upper() not in ["GET", "POST", "PUT", "PATCH", "DELETE"]:
                     continue
+                # Operations Fern leaves out of the SDKs are not part of the published surface
+                if operation.get("x-fern-ignore"):
+                    continue
                 
                 endpoint_key = f"{method.upper()} {path}"
                 endpoint_info = {
@@ -125,36 +1913,48 @@ class OpenAPIFieldDiff:
                     "summary": operation.get("summary", ""),
                     "request_body": {},
                     "responses": {},
-                    "parameters": []
+                    "parameters": [],
+                    # Merkle fingerprints used to skip unchanged subtrees when comparing
+                    "fingerprints": {
+                        "operation": self.resolver.fingerprint(operation),
+                        "request_body": {},
+                        "responses": {},
+                        "parameters": self.resolver.fingerprint(operation.get("parameters", [])),
+                    }
                 }
+                fingerprints = endpoint_info["fingerprints"]
                 
                 # Extract request body schema
                 if "requestBody" in operation:
-                    content = operation["requestBody"].get("content", {})
+                    content = self.resolver.deref(operation["requestBody"]).get("content", {})
                     for media_type, media_obj in content.items():
                         if "schema" in media_obj:
                             request_fields = self.extract_schema_fields(media_obj["schema"])
                             endpoint_info["request_body"][media_type] = request_fields
+                            fingerprints["request_body"][media_type] = self.resolver.fingerprint(media_obj["schema"])
                 
                 # Extract response schemas
                 if "responses" in operation:
                     for status_code, response_obj in operation["responses"].items():
-                        content = response_obj.get("content", {})
+                        content = self.resolver.deref(response_obj).get("content", {})
                         for media_type, media_obj in content.items():
                             if "schema" in media_obj:
                                 response_fields = self.extract_schema_fields(media_obj["schema"])
                                 if status_code not in endpoint_info["responses"]:
                                     endpoint_info["responses"][status_code] = {}
+                                    fingerprints["responses"][status_code] = {}
                                 endpoint_info["responses"][status_code][media_type] = response_fields
+                                fingerprints["responses"][status_code][media_type] = self.resolver.fingerprint(media_obj["schema"])
                 
                 # Extract parameters
                 if "parameters" in operation:
                     for param in operation["parameters"]:
+                        param = self.resolver.deref(param)
                         param_info = {
                             "name": param.get("name", ""),
                             "in": param.get("in", ""),
                             "required": param.get("required", False),
-                            "type": param.get("schema", {}).get("type", "string"),
+                            "type": self.resolver.deref(param.get("schema", {})).get("type", "string"),
                             "description": param.get("description", "")
                         }
                         endpoint_info["parameters"].append(param_info)
@@ -163,77 +1963,308 @@ class OpenAPIFieldDiff:
         
         return endpoints
     
-    def compare_field_sets(self, old_fields: Dict, new_fields: Dict) -> Dict[str, List]:
-        """Compare two sets of fields and return the differences."""
-        changes = {
-            "added": [],
-            "removed": [],
-            "modified": [],
-            "type_changed": [],
-            "required_changed": []
-        }
+    @PROFILE.timed("flatten")
+    def get_channel_schemas(self, spec: Dict) -> Dict[str, Dict]:
+        """Extract all AsyncAPI channels with their path and query parameters and message fields."""
+        channels = {}
+        self.resolver = SchemaResolver(spec)
         
-        # Find added fields
-        for field_path in new_fields:
-            if field_path not in old_fields:
-                changes["added"].append({
-                    "field": field_path,
-                    "details": new_fields[field_path]
-                })
+        for channel_name, channel in (spec.get("channels") or {}).items():
+            description = channel.get("description") or ""
+            channel_info = {
+                "summary": channel.get("summary") or description.strip().split("\n")[0],
+                "publish": {},
+                "subscribe": {},
+                "parameters": [],
+                # Merkle fingerprints used to skip unchanged subtrees when comparing
+                "fingerprints": {
+                    "channel": self.resolver.fingerprint(channel),
+                    "publish": {},
+                    "subscribe": {},
+                    "parameters": None,
+                }
+            }
+            fingerprints = channel_info["fingerprints"]
+            
+            # Extract message payloads sent by the client (publish) and the server (subscribe)
+            for direction in ("publish", "subscribe"):
+                for message_name, message in self.channel_messages(channel.get(direction, {})).items():
+                    payload = self.resolver.deref(message).get("payload", {})
+                    channel_info[direction][message_name] = self.extract_schema_fields(payload)
+                    fingerprints[direction][message_name] = self.resolver.fingerprint(message)
+            
+            # Extract channel (path) parameters
+            for param_name, param in (channel.get("parameters") or {}).items():
+                param = self.resolver.deref(param)
+                param_info = {
+                    "name": param_name,
+                    "in": "path",
+                    "required": True,
+                    "type": self.resolver.deref(param.get("schema", {})).get("type", "string"),
+                    "description": param.get("description", "")
+                }
+                channel_info["parameters"].append(param_info)
+            
+            # The WebSocket query binding is an object schema of query parameters, which the
+            # SDKs take as connect arguments like the query parameters of an HTTP endpoint
+            query = self.resolver.deref(channel.get("bindings", {}).get("ws", {}).get("query", {}))
+            if query:
+                required = set(query.get("required") or [])
+                for param_name, param in self.binding_query_schema(query).get("properties", {}).items():
+                    param = self.resolver.deref(param)
+                    channel_info["parameters"].append({
+                        "name": param_name,
+                        "in": "query",
+                        "required": param_name in required,
+                        "type": param.get("type", "string"),
+                        "description": param.get("description", "")
+                    })
+            fingerprints["parameters"] = self.resolver.fingerprint(channel_info["parameters"])
+            
+            channels[channel_name] = channel_info
         
-        # Find removed fields
-        for field_path in old_fields:
-            if field_path not in new_fields:
-                changes["removed"].append({
-                    "field": field_path,
-                    "details": old_fields[field_path]
-                })
+        return channels
+    
+    @PROFILE.timed("flatten")
+    def get_schema_usage(self, spec: Dict) -> Dict[str, List[str]]:
+        """Map every component schema to the operations reaching it, keyed as in get_endpoint_schemas."""
+        operations = {}
+        for path, path_obj in spec.get("paths", {}).items():
+            for method, operation in path_obj.items():
+                if method.upper() not in ["GET", "POST", "PUT", "PATCH", "DELETE"]:
+                    continue
+                if operation.get("x-fern-ignore"):
+                    continue
+                # Path-level parameters apply to every operation under the path
+                operations[f"{method.upper()} {path}"] = [path_obj.get("parameters", []), operation]
+        return schema_usage(SchemaResolver(spec), operations)
+    
+    @PROFILE.timed("flatten")
+    def get_channel_schema_usage(self, spec: Dict) -> Dict[str, List[str]]:
+        """Map every component schema of an AsyncAPI document to the channels reaching it."""
+        return schema_usage(SchemaResolver(spec), dict(spec.get("channels") or {}))
+    
+    def binding_query_schema(self, query: Dict) -> Dict:
+        """Inline the `schema` of query properties written as AsyncAPI parameter objects."""
+        properties = {}
+        for name, prop in query.get("properties", {}).items():
+            if isinstance(prop, dict) and isinstance(prop.get("schema"), dict) and "type" not in prop:
+                prop = {**prop["schema"], **{key: value for key, value in prop.items() if key != "schema"}}
+            properties[name] = prop
+        return {**query, "properties": properties}
+    
+    def channel_messages(self, operation: Dict) -> Dict[str, Dict]:
+        """Map the messages of a publish or subscribe operation by name."""
+        message = operation.get("message") if isinstance(operation, dict) else None
+        if not isinstance(message, dict):
+            return {}
         
-        # Find modified fields
-        for field_path in old_fields:
-            if field_path in new_fields:
-                old_field = old_fields[field_path]
-                new_field = new_fields[field_path]
-                
-                # Check for type changes
-                if old_field["type"] != new_field["type"]:
-                    changes["type_changed"].append({
+        messages = {}
+        for candidate in message.get("oneOf", [message]):
+            if "$ref" in candidate:
+                name = candidate["$ref"].rsplit("/", 1)[-1]
+            else:
+                name = candidate.get("name") or candidate.get("messageId") or "message"
+            messages[name] = candidate
+        return messages
+    
+    def compare_field_sets(self, old_fields: Dict, new_fields: Dict, shared: Optional[SharedSchemaChanges] = None,
+                           mounts: Optional[Dict[str, Dict[str, None]]] = None) -> Dict[str, List]:
+        """Compare two sets of fields and return the differences.
+        
+        With `shared`, changes to fields declared by a component schema are
+        attributed to that schema there instead, and the schemas reached are
+        recorded in `mounts` by name, with the paths they are mounted at.
+        """
+        changes = {kind: [] for kind in FIELD_CHANGE_KINDS}
+        removed = []
+        
+        # One pass over the old fields finds removals and modifications
+        for field_path, old_field in old_fields.items():
+            new_field = new_fields.get(field_path)
+            if new_field is None:
+                removed.append((field_path, old_field))
+                continue
+            
+            # Records shared through the same component schema cannot differ
+            if old_field is not new_field:
+                if (shared is not None and old_field.owner is not None and old_field.owner == new_field.owner
+                        and old_field.name == new_field.name):
+                    shared.compare(self, field_path, old_field, new_field, mounts)
+                else:
+                    self.compare_field_records(field_path, old_field, new_field, changes)
+        
+        # Every field not matched above is new; skip the scan when counts show there are none
+        added = []
+        if len(new_fields) != len(old_fields) - len(removed):
+            added = [(field_path, new_field) for field_path, new_field in new_fields.items()
+                     if field_path not in old_fields]
+        
+        for kind, fields, other_fields in (("removed", removed, new_fields), ("added", added, old_fields)):
+            # A schema's own fields only come and go where the other side mounts the same schema
+            other_mounts = None
+            if shared is not None and any(record.owner is not None for _, record in fields):
+                other_mounts = self.schema_mounts(other_fields)
+            covered = None
+            for field_path, record in fields:
+                # Fields nested in one attributed to a schema come and go with it; flattening lists them right after it
+                if covered is not None and field_path.startswith(covered) and field_path[len(covered):][:1] in (".", "["):
+                    continue
+                if other_mounts is not None and (record.owner, _mount_prefix(field_path, record.name)) in other_mounts:
+                    shared.add(kind, field_path, record, mounts)
+                    covered = field_path
+                else:
+                    changes[kind].append({
                         "field": field_path,
-                        "old_type": old_field["type"],
-                        "new_type": new_field["type"]
+                        "details": record.to_dict()
                     })
-                
-                # Check for required changes
-                if old_field["required"] != new_field["required"]:
-                    changes["required_changed"].append({
+        
+        return changes
+    
+    def schema_mounts(self, fields: Dict[str, FieldRecord]) -> set:
+        """The (component schema, path) pairs at which a flattened field set includes a schema's own fields."""
+        return {(record.owner, _mount_prefix(field_path, record.name))
+                for field_path, record in fields.items() if record.owner is not None}
+    
+    def compare_field_records(self, field_path: str, old_field: FieldRecord, new_field: FieldRecord,
+                              changes: Dict[str, List]) -> None:
+        """Append the differences between two versions of one field to `changes`."""
+        # Check for type changes
+        if old_field.type != new_field.type:
+            changes["type_changed"].append({
+                "field": field_path,
+                "old_type": old_field.type,
+                "new_type": new_field.type
+            })
+        
+        # Check for required changes
+        if old_field.required != new_field.required:
+            changes["required_changed"].append({
+                "field": field_path,
+                "old_required": old_field.required,
+                "new_required": new_field.required
+            })
+        
+        # Check for other modifications
+        modified_attrs = []
+        for attr in ["nullable", "format"]:
+            if getattr(old_field, attr) != getattr(new_field, attr):
+                modified_attrs.append({
+                    "attribute": attr,
+                    "old_value": getattr(old_field, attr),
+                    "new_value": getattr(new_field, attr)
+                })
+        
+        # Enums that exist on both sides are diffed value by value with set algebra
+        if old_field.enum_values is not None and new_field.enum_values is not None:
+            if old_field.enum_values != new_field.enum_values:
+                added_values = [v for v in new_field.enum if v not in old_field.enum_values]
+                removed_values = [v for v in old_field.enum if v not in new_field.enum_values]
+                if added_values:
+                    changes["enum_values_added"].append({"field": field_path, "values": added_values})
+                if removed_values:
+                    changes["enum_values_removed"].append({"field": field_path, "values": removed_values})
+        elif old_field.enum != new_field.enum:
+            modified_attrs.append({
+                "attribute": "enum",
+                "old_value": list(old_field.enum) if old_field.enum is not None else None,
+                "new_value": list(new_field.enum) if new_field.enum is not None else None
+            })
+        
+        if modified_attrs:
+            changes["modified"].append({
+                "field": field_path,
+                "changes": modified_attrs
+            })
+        
+        # Check for validation constraint changes
+        if old_field.constraints != new_field.constraints:
+            old_constraints = old_field.constraints or {}
+            new_constraints = new_field.constraints or {}
+            for key in CONSTRAINT_KEYS:
+                old_value = old_constraints.get(key)
+                new_value = new_constraints.get(key)
+                if old_value != new_value:
+                    changes["constraint_changed"].append({
                         "field": field_path,
-                        "old_required": old_field["required"],
-                        "new_required": new_field["required"]
+                        "constraint": key,
+                        "old_value": old_value,
+                        "new_value": new_value,
+                        "tightened": self.is_constraint_tightened(key, old_value, new_value)
                     })
+        
+        # Check for default value changes
+        if old_field.default != new_field.default:
+            changes["default_changed"].append({
+                "field": field_path,
+                "old_default": old_field.default,
+                "new_default": new_field.default
+            })
+    
+    def is_constraint_tightened(self, key: str, old_value: Any, new_value: Any) -> bool:
+        """Whether a constraint change can reject values that were valid before."""
+        if new_value is None:
+            return False
+        if key == "pattern":
+            return True
+        # OpenAPI 3.0 uses booleans for exclusiveMinimum/exclusiveMaximum
+        if isinstance(new_value, bool) or isinstance(old_value, bool):
+            return new_value is True and old_value is not True
+        if old_value is None:
+            return True
+        try:
+            if key in LOWER_BOUND_CONSTRAINTS:
+                return new_value > old_value
+            return new_value < old_value
+        except TypeError:
+            return True
+    
+    def compare_parameters(self, old_parameters: List[Dict], new_parameters: List[Dict]) -> Dict[str, List]:
+        """Compare two parameter lists and return the differences."""
+        old_params = {p["name"]: p for p in old_parameters}
+        new_params = {p["name"]: p for p in new_parameters}
+        
+        param_changes = {}
+        # Added parameters
+        for param_name in new_params:
+            if param_name not in old_params:
+                if "added" not in param_changes:
+                    param_changes["added"] = []
+                param_changes["added"].append(new_params[param_name])
+        
+        # Removed parameters
+        for param_name in old_params:
+            if param_name not in new_params:
+                if "removed" not in param_changes:
+                    param_changes["removed"] = []
+                param_changes["removed"].append(old_params[param_name])
+        
+        # Modified parameters
+        for param_name in old_params:
+            if param_name in new_params:
+                old_param = old_params[param_name]
+                new_param = new_params[param_name]
                 
-                # Check for other modifications
-                modified_attrs = []
-                for attr in ["nullable", "format", "enum"]:
-                    if old_field.get(attr) != new_field.get(attr):
-                        modified_attrs.append({
-                            "attribute": attr,
-                            "old_value": old_field.get(attr),
-                            "new_value": new_field.get(attr)
-                        })
-                
-                if modified_attrs:
-                    changes["modified"].append({
-                        "field": field_path,
-                        "changes": modified_attrs
+                if old_param != new_param:
+                    if "modified" not in param_changes:
+                        param_changes["modified"] = []
+                    param_changes["modified"].append({
+                        "name": param_name,
+                        "old": old_param,
+                        "new": new_param
                     })
         
-        return changes
+        return param_changes
     
     def compare_endpoints(self, old_spec: Dict, new_spec: Dict) -> Dict:
         """Compare endpoints between two OpenAPI specs."""
         old_endpoints = self.get_endpoint_schemas(old_spec)
         new_endpoints = self.get_endpoint_schemas(new_spec)
-        
+        return self.compare_endpoint_indexes(old_endpoints, new_endpoints)
+    
+    @PROFILE.timed("compare")
+    def compare_endpoint_indexes(self, old_endpoints: Dict[str, Dict], new_endpoints: Dict[str, Dict]) -> Dict:
+        """Compare two flattened endpoint indexes as built by get_endpoint_schemas."""
         results = {
             "new_endpoints": [],
             "removed_endpoints": [],
@@ -258,37 +2289,60 @@ class OpenAPIFieldDiff:
                     "summary": old_endpoints[endpoint]["summary"]
                 })
         
-        # Find modified endpoints
+        # Find modified endpoints; changes to component schemas are collected once across all of them
+        shared = SharedSchemaChanges()
+        candidates = {}
         for endpoint in old_endpoints:
             if endpoint in new_endpoints:
                 old_endpoint = old_endpoints[endpoint]
                 new_endpoint = new_endpoints[endpoint]
+                old_prints = old_endpoint["fingerprints"]
+                new_prints = new_endpoint["fingerprints"]
+                
+                # Identical operations cannot contain field-level changes
+                if old_prints["operation"] == new_prints["operation"]:
+                    continue
                 
                 endpoint_changes = {}
+                breaking = False
+                schema_uses = {}
                 
-                # Compare request body
+                # Compare request body; ordered unions keep the output identical from run to run
                 if old_endpoint["request_body"] or new_endpoint["request_body"]:
-                    for media_type in set(old_endpoint["request_body"].keys()) | set(new_endpoint["request_body"].keys()):
+                    for media_type in dict.fromkeys([*old_endpoint["request_body"], *new_endpoint["request_body"]]):
+                        if old_prints["request_body"].get(media_type) == new_prints["request_body"].get(media_type):
+                            continue
                         old_fields = old_endpoint["request_body"].get(media_type, {})
                         new_fields = new_endpoint["request_body"].get(media_type, {})
                         
-                        field_changes = self.compare_field_sets(old_fields, new_fields)
+                        mounts = {}
+                        field_changes = self.compare_field_sets(old_fields, new_fields, shared, mounts)
+                        self.record_schema_uses(schema_uses, mounts, location="request_body", media_type=media_type)
                         if any(field_changes.values()):
+                            breaking |= self.classify_field_changes(field_changes, "request")
                             if "request_body" not in endpoint_changes:
                                 endpoint_changes["request_body"] = {}
                             endpoint_changes["request_body"][media_type] = field_changes
                 
                 # Compare responses
-                for status_code in set(old_endpoint["responses"].keys()) | set(new_endpoint["responses"].keys()):
+                for status_code in dict.fromkeys([*old_endpoint["responses"], *new_endpoint["responses"]]):
                     old_response = old_endpoint["responses"].get(status_code, {})
                     new_response = new_endpoint["responses"].get(status_code, {})
+                    old_response_prints = old_prints["responses"].get(status_code, {})
+                    new_response_prints = new_prints["responses"].get(status_code, {})
                     
-                    for media_type in set(old_response.keys()) | set(new_response.keys()):
+                    for media_type in dict.fromkeys([*old_response, *new_response]):
+                        if old_response_prints.get(media_type) == new_response_prints.get(media_type):
+                            continue
                         old_fields = old_response.get(media_type, {})
                         new_fields = new_response.get(media_type, {})
                         
-                        field_changes = self.compare_field_sets(old_fields, new_fields)
+                        mounts = {}
+                        field_changes = self.compare_field_sets(old_fields, new_fields, shared, mounts)
+                        self.record_schema_uses(schema_uses, mounts, location="response", status_code=status_code,
+                                                media_type=media_type)
                         if any(field_changes.values()):
+                            breaking |= self.classify_field_changes(field_changes, "response")
                             if "responses" not in endpoint_changes:
                                 endpoint_changes["responses"] = {}
                             if status_code not in endpoint_changes["responses"]:
@@ -296,154 +2350,303 @@ class OpenAPIFieldDiff:
                             endpoint_changes["responses"][status_code][media_type] = field_changes
                 
                 # Compare parameters
-                old_params = {p["name"]: p for p in old_endpoint["parameters"]}
-                new_params = {p["name"]: p for p in new_endpoint["parameters"]}
-                
-                param_changes = {}
-                # Added parameters
-                for param_name in new_params:
-                    if param_name not in old_params:
-                        if "added" not in param_changes:
-                            param_changes["added"] = []
-                        param_changes["added"].append(new_params[param_name])
-                
-                # Removed parameters
-                for param_name in old_params:
-                    if param_name not in new_params:
-                        if "removed" not in param_changes:
-                            param_changes["removed"] = []
-                        param_changes["removed"].append(old_params[param_name])
-                
-                # Modified parameters
-                for param_name in old_params:
-                    if param_name in new_params:
-                        old_param = old_params[param_name]
-                        new_param = new_params[param_name]
-                        
-                        if old_param != new_param:
-                            if "modified" not in param_changes:
-                                param_changes["modified"] = []
-                            param_changes["modified"].append({
-                                "name": param_name,
-                                "old": old_param,
-                                "new": new_param
-                            })
+                if old_prints["parameters"] != new_prints["parameters"]:
+                    param_changes = self.compare_parameters(old_endpoint["parameters"], new_endpoint["parameters"])
+                    if param_changes:
+                        breaking |= self.classify_parameter_changes(param_changes)
+                        endpoint_changes["parameters"] = param_changes
                 
+                if endpoint_changes or schema_uses:
+                    endpoint_changes["breaking"] = breaking
+                    candidates[endpoint] = (endpoint_changes, schema_uses)
+        
+        # Only now is it known which of the schemas an endpoint reaches actually changed
+        for endpoint, (endpoint_changes, schema_uses) in candidates.items():
+            changed = {name: uses for name, uses in schema_uses.items() if any(shared.changes.get(name, {}).values())}
+            if changed:
+                endpoint_changes["schemas"] = changed
+            if changed or len(endpoint_changes) > 1:
+                results["modified_endpoints"][endpoint] = endpoint_changes
+        
+        results["modified_schemas"] = self.summarize_schema_changes(shared.changes, results["modified_endpoints"])
+        return results
+    
+    def record_schema_uses(self, schema_uses: Dict[str, List], mounts: Dict[str, Dict[str, None]], **where) -> None:
+        """Add the schemas a request or response body mounts, and where, to an endpoint's schema uses."""
+        for name, paths in mounts.items():
+            schema_uses.setdefault(name, []).extend({**where, "path": path} for path in paths)
+    
+    def summarize_schema_changes(self, schema_changes: Dict[str, Dict[str, List]],
+                                 modified_endpoints: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Classify shared schema changes and list the modified endpoints using each schema.
+        
+        A schema change is classified once for every direction the schema is
+        used in, and endpoints using a schema in a direction where it broke
+        are flagged as breaking too.
+        """
+        users: Dict[str, Dict[str, None]] = {}
+        directions: Dict[str, Dict[str, None]] = {}
+        for endpoint, endpoint_changes in modified_endpoints.items():
+            for name, uses in endpoint_changes.get("schemas", {}).items():
+                users.setdefault(name, {})[endpoint] = None
+                for use in uses:
+                    directions.setdefault(name, {})[_use_direction(use)] = None
+        
+        summary = {}
+        breaking_directions: Dict[str, set] = {}
+        for name in sorted(users):
+            breaking_directions[name] = set()
+            for change_kind, changes in schema_changes[name].items():
+                for change in changes:
+                    change["breaking_by_direction"] = {
+                        direction: self.classify_change("body", change_kind, direction, change)
+                        for direction in directions[name]
+                    }
+                    change["breaking"] = any(change["breaking_by_direction"].values())
+                    breaking_directions[name].update(
+                        direction for direction, breaking in change["breaking_by_direction"].items() if breaking
+                    )
+            summary[name] = {
+                "breaking": bool(breaking_directions[name]),
+                "endpoints": list(users[name]),
+                "changes": schema_changes[name],
+            }
+        
+        for endpoint_changes in modified_endpoints.values():
+            for name, uses in endpoint_changes.get("schemas", {}).items():
+                if any(_use_direction(use) in breaking_directions[name] for use in uses):
+                    endpoint_changes["breaking"] = True
+        return summary
+    
+    def merge_schema_changes(self, schema_changes: List[Dict[str, Dict[str, List]]]) -> Dict[str, Dict[str, List]]:
+        """Union shared schema changes collected by separate comparisons, keeping the first copy of each."""
+        merged: Dict[str, Dict[str, List]] = {}
+        for changes_by_schema in schema_changes:
+            for name, changes in changes_by_schema.items():
+                target = merged.setdefault(name, {kind: [] for kind in FIELD_CHANGE_KINDS})
+                for change_kind, changes_of_kind in changes.items():
+                    seen = {(change["field"], change.get("constraint")) for change in target[change_kind]}
+                    target[change_kind].extend(
+                        change for change in changes_of_kind if (change["field"], change.get("constraint")) not in seen
+                    )
+        return merged
+    
+    @PROFILE.timed("compare")
+    def compare_channel_indexes(self, old_channels: Dict[str, Dict], new_channels: Dict[str, Dict]) -> Dict:
+        """Compare two flattened AsyncAPI channel indexes as built by get_channel_schemas."""
+        results = {
+            "new_channels": [],
+            "removed_channels": [],
+            "modified_channels": {}
+        }
+        
+        for channel in new_channels:
+            if channel not in old_channels:
+                results["new_channels"].append({"channel": channel, "summary": new_channels[channel]["summary"]})
+        
+        for channel in old_channels:
+            if channel not in new_channels:
+                results["removed_channels"].append({"channel": channel, "summary": old_channels[channel]["summary"]})
+        
+        for channel in old_channels:
+            if channel not in new_channels:
+                continue
+            old_channel = old_channels[channel]
+            new_channel = new_channels[channel]
+            old_prints = old_channel["fingerprints"]
+            new_prints = new_channel["fingerprints"]
+            
+            # Identical channels cannot contain field-level changes
+            if old_prints["channel"] == new_prints["channel"]:
+                continue
+            
+            channel_changes = {}
+            breaking = False
+            
+            # Compare messages in both directions; published messages are sent by the client
+            # like a request, subscribed ones are received like a response
+            for direction in ("publish", "subscribe"):
+                old_messages = old_channel[direction]
+                new_messages = new_channel[direction]
+                for message_name in dict.fromkeys([*old_messages, *new_messages]):
+                    if old_prints[direction].get(message_name) == new_prints[direction].get(message_name):
+                        continue
+                    field_changes = self.compare_field_sets(old_messages.get(message_name, {}),
+                                                            new_messages.get(message_name, {}))
+                    if any(field_changes.values()):
+                        breaking |= self.classify_field_changes(
+                            field_changes, "request" if direction == "publish" else "response")
+                        channel_changes.setdefault(direction, {})[message_name] = field_changes
+            
+            # Compare channel path parameters and query binding parameters
+            if old_prints["parameters"] != new_prints["parameters"]:
+                param_changes = self.compare_parameters(old_channel["parameters"], new_channel["parameters"])
                 if param_changes:
-                    endpoint_changes["parameters"] = param_changes
-                
-                if endpoint_changes:
-                    results["modified_endpoints"][endpoint] = endpoint_changes
+                    breaking |= self.classify_parameter_changes(param_changes)
+                    channel_changes["parameters"] = param_changes
+            
+            if channel_changes:
+                channel_changes["breaking"] = breaking
+                results["modified_channels"][channel] = channel_changes
         
         return results
     
-    def is_breaking_change(self, change_type: str, change_data: Dict) -> bool:
-        """Determine if a change is breaking."""
-        breaking_patterns = [
-            # Field removals are breaking
-            lambda ct, cd: ct in ["removed_field", "removed_parameter"],
-            # Required field additions are breaking
-            lambda ct, cd: ct == "added_field" and cd.get("details", {}).get("required", False),
-            # Type changes are usually breaking
-            lambda ct, cd: ct == "type_changed",
-            # Making fields required is breaking
-            lambda ct, cd: ct == "required_changed" and cd.get("new_required", False) and not cd.get("old_required", False),
-            # Removing nullable is breaking
-            lambda ct, cd: ct == "modified_field" and any(
-                c.get("attribute") == "nullable" and c.get("old_value") == True and c.get("new_value") == False
-                for c in cd.get("changes", [])
-            )
-        ]
+    def classify_change(self, location: str, change_kind: str, direction: str, change: Dict) -> bool:
+        """Look up whether one change is breaking in BREAKING_CHANGE_RULES."""
+        rule = BREAKING_CHANGE_RULES.get((location, change_kind, direction), False)
+        return bool(rule(change)) if callable(rule) else rule
+    
+    def classify_field_changes(self, field_changes: Dict[str, List], direction: str) -> bool:
+        """Store a "breaking" flag on each field change; returns whether any is breaking."""
+        breaking = False
+        for change_kind, changes in field_changes.items():
+            for change in changes:
+                change["breaking"] = self.classify_change("body", change_kind, direction, change)
+                breaking |= change["breaking"]
+        return breaking
+    
+    def classify_parameter_changes(self, param_changes: Dict[str, List]) -> bool:
+        """Store a "breaking" flag on each parameter change; returns whether any is breaking.
         
-        return any(pattern(change_type, change_data) for pattern in breaking_patterns)
+        Added and removed entries are the index's own parameter dicts, so they
+        are copied rather than flagged in place.
+        """
+        breaking = False
+        for change_kind, params in param_changes.items():
+            flagged = []
+            for param in params:
+                location = (param["new"] if change_kind == "modified" else param).get("in")
+                if location not in PARAMETER_LOCATIONS:
+                    location = "query"
+                flagged.append({**param, "breaking": self.classify_change(location, change_kind, "request", param)})
+                breaking |= flagged[-1]["breaking"]
+            param_changes[change_kind] = flagged
+        return breaking
     
+    @PROFILE.timed("format")
     def format_changes_markdown(self, comparison_results: Dict) -> str:
         """Format the comparison results as markdown for changelog."""
-        markdown = []
+        return "\n".join(self.iter_changes_markdown(comparison_results))
+    
+    def iter_changes_markdown(self, comparison_results: Dict) -> Iterator[str]:
+        """Yield the changelog markdown of comparison results line by line.
         
+        Breaking endpoints are listed before compatible ones using the flag
+        stored at compare time; everything else is rendered only as it is
+        consumed.
+        """
         # New Endpoints
         if comparison_results["new_endpoints"]:
-            markdown.append("## New Endpoints\n")
+            yield "## New Endpoints\n"
             for endpoint in comparison_results["new_endpoints"]:
                 summary = endpoint["summary"] or endpoint["operation_id"]
-                markdown.append(f"- `{endpoint['endpoint']}` - {summary}")
-            markdown.append("")
+                yield f"- `{endpoint['endpoint']}` - {summary}"
+            yield ""
         
-        # Modified Endpoints
-        if comparison_results["modified_endpoints"]:
-            markdown.append("## Updated Endpoints\n")
-            
-            breaking_endpoints = []
-            compatible_endpoints = []
-            
-            for endpoint, changes in comparison_results["modified_endpoints"].items():
-                has_breaking = self.has_breaking_changes(changes)
-                
-                endpoint_info = {
-                    "endpoint": endpoint,
-                    "changes": changes,
-                    "breaking": has_breaking
-                }
-                
-                if has_breaking:
-                    breaking_endpoints.append(endpoint_info)
-                else:
-                    compatible_endpoints.append(endpoint_info)
+        # Modified Endpoints; those whose only changes are in shared schemas are listed under Updated Schemas
+        modified = {
+            endpoint: changes for endpoint, changes in comparison_results["modified_endpoints"].items()
+            if any(key not in ("schemas", "breaking") for key in changes)
+        }
+        if modified:
+            yield "## Updated Endpoints\n"
             
-            # Breaking changes first
-            if breaking_endpoints:
-                markdown.append("### Breaking Changes\n")
-                for info in breaking_endpoints:
-                    markdown.extend(self.format_endpoint_changes(info["endpoint"], info["changes"], True))
-                markdown.append("")
+            breaking = {endpoint: self.has_breaking_changes(changes) for endpoint, changes in modified.items()}
             
-            # Backward compatible changes
-            if compatible_endpoints:
-                markdown.append("### Backward Compatible Changes\n")
-                for info in compatible_endpoints:
-                    markdown.extend(self.format_endpoint_changes(info["endpoint"], info["changes"], False))
-                markdown.append("")
+            # Breaking changes first, then backward compatible changes
+            for is_breaking, heading in ((True, "### Breaking Changes\n"), (False, "### Backward Compatible Changes\n")):
+                endpoints = [endpoint for endpoint in modified if breaking[endpoint] is is_breaking]
+                if endpoints:
+                    yield heading
+                    for endpoint in endpoints:
+                        yield from self.format_endpoint_changes(endpoint, modified[endpoint], is_breaking)
+                    yield ""
+        
+        # Modified Schemas, each listed once with the endpoints using it
+        if comparison_results.get("modified_schemas"):
+            yield "## Updated Schemas\n"
+            schemas = comparison_results["modified_schemas"]
+            for is_breaking in (True, False):
+                for name, schema in schemas.items():
+                    if schema["breaking"] is is_breaking:
+                        yield from self.format_schema_changes(name, schema)
+            yield ""
         
         # Removed Endpoints
         if comparison_results["removed_endpoints"]:
-            markdown.append("## Removed Endpoints\n")
+            yield "## Removed Endpoints\n"
             for endpoint in comparison_results["removed_endpoints"]:
                 summary = endpoint["summary"] or endpoint["operation_id"]
-                markdown.append(f"- `{endpoint['endpoint']}` - {summary}")
-            markdown.append("")
-        
-        return "\n".join(markdown)
+                yield f"- `{endpoint['endpoint']}` - {summary}"
+            yield ""
     
     def has_breaking_changes(self, endpoint_changes: Dict) -> bool:
-        """Check if endpoint changes contain breaking changes."""
-        # Check request body changes
-        if "request_body" in endpoint_changes:
-            for media_type, field_changes in endpoint_changes["request_body"].items():
-                for change_type, changes in field_changes.items():
-                    for change in changes:
-                        if self.is_breaking_change(f"{change_type.rstrip('s')}_field", change):
-                            return True
-        
-        # Check response changes
-        if "responses" in endpoint_changes:
-            for status_code, responses in endpoint_changes["responses"].items():
+        """Check if endpoint changes contain breaking changes, as classified when they were compared."""
+        return endpoint_changes["breaking"]
+    
+    @PROFILE.timed("format")
+    def change_rows(self, comparison_results: Dict) -> List[Dict[str, Any]]:
+        """Flatten comparison results into one row per atomic change."""
+        rows = []
+        for endpoint in comparison_results["new_endpoints"]:
+            rows.append({"endpoint": endpoint["endpoint"], "location": "endpoint", "change": "added",
+                         "breaking": False, "details": endpoint})
+        for endpoint in comparison_results["removed_endpoints"]:
+            rows.append({"endpoint": endpoint["endpoint"], "location": "endpoint", "change": "removed",
+                         "breaking": True, "details": endpoint})
+        
+        for endpoint, changes in comparison_results["modified_endpoints"].items():
+            for media_type, field_changes in changes.get("request_body", {}).items():
+                rows.extend(self.field_change_rows(endpoint, "request_body", None, media_type, field_changes))
+            for status_code, responses in changes.get("responses", {}).items():
                 for media_type, field_changes in responses.items():
-                    for change_type, changes in field_changes.items():
-                        for change in changes:
-                            if self.is_breaking_change(f"{change_type.rstrip('s')}_field", change):
-                                return True
-        
-        # Check parameter changes
-        if "parameters" in endpoint_changes:
-            param_changes = endpoint_changes["parameters"]
-            if "removed" in param_changes:
-                return True
-            if "added" in param_changes:
-                for param in param_changes["added"]:
-                    if param.get("required", False):
-                        return True
-        
-        return False
+                    rows.extend(self.field_change_rows(endpoint, "response", status_code, media_type, field_changes))
+            for change_type, params in changes.get("parameters", {}).items():
+                for param in params:
+                    rows.append({"endpoint": endpoint, "location": "parameter", "field": param["name"],
+                                 "change": change_type, "breaking": param["breaking"], "details": param})
+            # Shared schema changes become rows of every endpoint using the schema, at each place it is used
+            for name, uses in changes.get("schemas", {}).items():
+                schema_changes = comparison_results["modified_schemas"][name]["changes"]
+                for use in uses:
+                    direction = _use_direction(use)
+                    rows.extend(
+                        {
+                            "endpoint": endpoint,
+                            "location": use["location"],
+                            "status_code": use.get("status_code"),
+                            "media_type": use["media_type"],
+                            "field": _join_field_path(use["path"], change["field"]),
+                            "change": change_type,
+                            "breaking": change["breaking_by_direction"][direction],
+                            "details": {**change, "schema": name},
+                        }
+                        for change_type, schema_change_list in schema_changes.items()
+                        for change in schema_change_list
+                    )
+        return rows
+    
+    def field_change_rows(self, endpoint: str, location: str, status_code: Optional[str], media_type: str,
+                          field_changes: Dict[str, List]) -> List[Dict[str, Any]]:
+        """One row per field-level change of a request or response body."""
+        return [
+            {
+                "endpoint": endpoint,
+                "location": location,
+                "status_code": status_code,
+                "media_type": media_type,
+                "field": change["field"],
+                "change": change_type,
+                "breaking": change["breaking"],
+                "details": change,
+            }
+            for change_type, changes in field_changes.items()
+            for change in changes
+        ]
+    
+    def has_breaking_channel_changes(self, channel_changes: Dict) -> bool:
+        """Check if channel changes contain breaking changes, as classified when they were compared."""
+        return channel_changes["breaking"]
     
     def format_endpoint_changes(self, endpoint: str, changes: Dict, is_breaking: bool) -> List[str]:
         """Format changes for a single endpoint."""
@@ -466,21 +2669,109 @@ class OpenAPIFieldDiff:
         
         # Format parameter changes
         if "parameters" in changes:
-            param_changes = changes["parameters"]
-            lines.append("  - **Parameters:**")
+            lines.extend(self.format_parameter_changes(changes["parameters"]))
+        
+        # Shared schema changes are listed once under Updated Schemas
+        if "schemas" in changes:
+            uses = []
+            for name, schema_uses in changes["schemas"].items():
+                places = dict.fromkeys(
+                    "request" if use["location"] == "request_body" else f"response {use['status_code']}"
+                    for use in schema_uses
+                )
+                uses.append(f"`{name}` ({', '.join(places)})")
+            lines.append(f"  - **Shared schemas:** {', '.join(uses)}")
+        
+        return lines
+    
+    def format_schema_changes(self, name: str, schema: Dict) -> List[str]:
+        """Format the changes of a single component schema."""
+        breaking_marker = "🚨 **BREAKING**" if schema["breaking"] else "✅ **Compatible**"
+        lines = [f"- `{name}` - {breaking_marker}"]
+        lines.append(f"  - Used by: {', '.join(f'`{endpoint}`' for endpoint in schema['endpoints'])}")
+        # Changes to the schema as a whole are recorded on its root, the empty field
+        field_changes = {
+            change_kind: [{**change, "field": change["field"] or name} for change in changes]
+            for change_kind, changes in schema["changes"].items()
+        }
+        lines.extend(self.format_field_changes(field_changes, "  "))
+        return lines
+    
+    def format_parameter_changes(self, param_changes: Dict) -> List[str]:
+        """Format parameter-level changes."""
+        lines = ["  - **Parameters:**"]
+        
+        if "added" in param_changes:
+            for param in param_changes["added"]:
+                req_marker = " (required)" if param.get("required") else ""
+                lines.append(f"    - Added: `{param['name']}`{req_marker}")
+        
+        if "removed" in param_changes:
+            for param in param_changes["removed"]:
+                lines.append(f"    - Removed: `{param['name']}`")
+        
+        if "modified" in param_changes:
+            for param in param_changes["modified"]:
+                lines.append(f"    - Modified: `{param['name']}`")
+        
+        return lines
+    
+    @PROFILE.timed("format")
+    def format_channel_changes_markdown(self, comparison_results: Dict) -> str:
+        """Format AsyncAPI channel comparison results as markdown for changelog."""
+        markdown = []
+        
+        if comparison_results["new_channels"]:
+            markdown.append("## New WebSocket Channels\n")
+            for channel in comparison_results["new_channels"]:
+                markdown.append(f"- `{channel['channel']}` - {channel['summary']}")
+            markdown.append("")
+        
+        if comparison_results["modified_channels"]:
+            markdown.append("## Updated WebSocket Channels\n")
             
-            if "added" in param_changes:
-                for param in param_changes["added"]:
-                    req_marker = " (required)" if param.get("required") else ""
-                    lines.append(f"    - Added: `{param['name']}`{req_marker}")
+            breaking_channels = []
+            compatible_channels = []
+            for channel, changes in comparison_results["modified_channels"].items():
+                if self.has_breaking_channel_changes(changes):
+                    breaking_channels.append((channel, changes))
+                else:
+                    compatible_channels.append((channel, changes))
             
-            if "removed" in param_changes:
-                for param in param_changes["removed"]:
-                    lines.append(f"    - Removed: `{param['name']}`")
+            # Breaking changes first
+            if breaking_channels:
+                markdown.append("### Breaking Changes\n")
+                for channel, changes in breaking_channels:
+                    markdown.extend(self.format_channel_changes(channel, changes, True))
+                markdown.append("")
             
-            if "modified" in param_changes:
-                for param in param_changes["modified"]:
-                    lines.append(f"    - Modified: `{param['name']}`")
+            if compatible_channels:
+                markdown.append("### Backward Compatible Changes\n")
+                for channel, changes in compatible_channels:
+                    markdown.extend(self.format_channel_changes(channel, changes, False))
+                markdown.append("")
+        
+        if comparison_results["removed_channels"]:
+            markdown.append("## Removed WebSocket Channels\n")
+            for channel in comparison_results["removed_channels"]:
+                markdown.append(f"- `{channel['channel']}` - {channel['summary']}")
+            markdown.append("")
+        
+        return "\n".join(markdown)
+    
+    def format_channel_changes(self, channel: str, changes: Dict, is_breaking: bool) -> List[str]:
+        """Format changes for a single AsyncAPI channel."""
+        lines = []
+        breaking_marker = "🚨 **BREAKING**" if is_breaking else "✅ **Compatible**"
+        lines.append(f"- `{channel}` - {breaking_marker}")
+        
+        for direction, label in (("publish", "Client message"), ("subscribe", "Server message")):
+            for message_name, field_changes in changes.get(direction, {}).items():
+                lines.append(f"  - **{label} ({message_name}):**")
+                lines.extend(self.format_field_changes(field_changes, "    "))
+        
+        if "parameters" in changes:
+            lines.extend(self.format_parameter_changes(changes["parameters"]))
         
         return lines
     
@@ -526,49 +2817,779 @@ class OpenAPIFieldDiff:
                     new_val = attr_change["new_value"]
                     lines.append(f"{indent}  - {attr}: `{old_val}` → `{new_val}`")
         
+        if field_changes.get("enum_values_added"):
+            for change in field_changes["enum_values_added"]:
+                field_name = change["field"]
+                values = ", ".join(f"`{value}`" for value in change["values"])
+                lines.append(f"{indent}- Enum values added: `{field_name}`: {values}")
+        
+        if field_changes.get("enum_values_removed"):
+            for change in field_changes["enum_values_removed"]:
+                field_name = change["field"]
+                values = ", ".join(f"`{value}`" for value in change["values"])
+                lines.append(f"{indent}- Enum values removed: `{field_name}`: {values}")
+        
+        if field_changes.get("constraint_changed"):
+            for change in field_changes["constraint_changed"]:
+                field_name = change["field"]
+                constraint = change["constraint"]
+                old_val = change["old_value"]
+                new_val = change["new_value"]
+                lines.append(f"{indent}- Constraint changed: `{field_name}` {constraint} from `{old_val}` to `{new_val}`")
+        
+        if field_changes.get("default_changed"):
+            for change in field_changes["default_changed"]:
+                field_name = change["field"]
+                old_default = change["old_default"]
+                new_default = change["new_default"]
+                lines.append(f"{indent}- Default changed: `{field_name}` from `{old_default}` to `{new_default}`")
+        
         return lines
     
-    def compare_specs(self, from_date: str, output_format: str = "markdown") -> str:
+    def compare_specs(self, from_date: str, output_format: str = "markdown",
+                      new_source: Optional[SpecSource] = None, jobs: Optional[int] = None,
+                      writer: Optional[ChangeRowWriter] = None) -> Union[str, Iterator[str]]:
         """Main comparison function."""
         print(f"Comparing OpenAPI specs from {from_date} to current...")
         
-        # Get old spec from git
-        old_spec = self.get_git_file_at_date(self.openapi_path, from_date)
-        if not old_spec:
+        commit_hash = self.get_git_commit_at_date(self.openapi_path, from_date)
+        if not commit_hash:
             return "Error: Could not retrieve old OpenAPI spec"
+        return self.compare_sources(GitRevisionSource(commit_hash, self.openapi_path, self.git),
+                                    new_source or self.current_source(), output_format, jobs, writer)
+    
+    def compare_sources(self, old_source: SpecSource, new_source: SpecSource, output_format: str = "markdown",
+                        jobs: Optional[int] = None, writer: Optional[ChangeRowWriter] = None) -> Union[str, Iterator[str]]:
+        """Compare the specs from two sources, across `jobs` worker processes if more than one.
         
-        # Get current spec from API
-        new_spec = self.get_current_openapi()
-        if not new_spec:
+        Markdown comes back as an iterator of lines for streaming output;
+        JSON, summaries and errors as a string. With a `writer`, the changes
+        are recorded as rows instead of formatted, and a pair of revisions
+        that is already recorded is not diffed again.
+        """
+        # Get old spec, from git by default
+        old_located = self.locate_source(old_source)
+        if old_located is None:
+            return "Error: Could not retrieve old OpenAPI spec"
+        
+        # Get new spec, from the API by default
+        new_located = self.locate_source(new_source)
+        if new_located is None:
             return "Error: Could not retrieve current OpenAPI spec"
         
+        if writer is not None and writer.recorded(old_located[0], new_located[0]):
+            return f"Changes from {old_source.describe()} to {new_source.describe()} are already recorded"
+        
         # Compare specs
-        comparison_results = self.compare_endpoints(old_spec, new_spec)
+        if jobs and jobs > 1:
+            comparison_results = self.compare_located_parallel(old_located, new_located, jobs)
+            if isinstance(comparison_results, str):
+                return comparison_results
+        else:
+            old_endpoints = self.load_endpoint_index(*old_located)
+            if old_endpoints is None:
+                return "Error: Could not retrieve old OpenAPI spec"
+            new_endpoints = self.load_endpoint_index(*new_located)
+            if new_endpoints is None:
+                return "Error: Could not retrieve current OpenAPI spec"
+            comparison_results = self.compare_endpoint_indexes(old_endpoints, new_endpoints)
+        
+        if writer is not None:
+            (from_revision, from_date), (to_revision, to_date) = old_source.provenance(), new_source.provenance()
+            interval = {
+                "from_key": old_located[0], "to_key": new_located[0],
+                "from_revision": from_revision, "to_revision": to_revision,
+                "from_date": from_date, "to_date": to_date,
+                "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            count = writer.write(interval, self.change_rows(comparison_results))
+            return f"Recorded {count} changes from {old_source.describe()} to {new_source.describe()}"
+        
+        if output_format == "json":
+            with PROFILE.stage("format"):
+                return json.dumps(comparison_results, indent=2)
+        else:
+            return self.iter_changes_markdown(comparison_results)
+
+    @PROFILE.timed("compare")
+    def compare_located_parallel(self, old_located: Tuple[str, Any], new_located: Tuple[str, Any], jobs: int):
+        """Flatten and diff two specs path by path in a process pool.
+        
+        Paths are split into contiguous chunks, and each worker receives only
+        its paths plus the components they reference. The chunk indexes are
+        reassembled in spec order, so the result (and the cached indexes) match
+        a serial run exactly. Returns an error message if a spec cannot be loaded.
+        """
+        old_key, load_old_spec = old_located
+        new_key, load_new_spec = new_located
+        
+        # Nothing CPU-bound is left once both indexes are cached
+        old_endpoints = self.cache.get(old_key) if self.cache else None
+        new_endpoints = self.cache.get(new_key) if self.cache else None
+        if old_endpoints is not None and new_endpoints is not None:
+            return self.compare_endpoint_indexes(old_endpoints, new_endpoints)
+        
+        old_spec = load_old_spec()
+        if not old_spec:
+            return "Error: Could not retrieve old OpenAPI spec"
+        new_spec = load_new_spec()
+        if not new_spec:
+            return "Error: Could not retrieve current OpenAPI spec"
+        
+        old_paths = old_spec.get("paths", {})
+        path_names = list(old_paths) + [name for name in new_spec.get("paths", {}) if name not in old_paths]
+        chunk_size = max(1, -(-len(path_names) // (jobs * 4)))
+        chunks = [path_names[i:i + chunk_size] for i in range(0, len(path_names), chunk_size)]
+        old_resolver, new_resolver = SchemaResolver(old_spec), SchemaResolver(new_spec)
+        
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            chunk_results = list(pool.map(
+                _diff_paths_worker,
+                [(old_resolver.subset(chunk), new_resolver.subset(chunk)) for chunk in chunks]
+            ))
+        
+        # Reassemble the full indexes in the order a serial flattening produces
+        old_endpoints = self.merge_chunk_indexes(old_spec, [old for old, _, _ in chunk_results])
+        new_endpoints = self.merge_chunk_indexes(new_spec, [new for _, new, _ in chunk_results])
+        if self.cache:
+            self.cache.put(old_key, old_endpoints)
+            self.cache.put(new_key, new_endpoints)
+        
+        modified = {}
+        for _, _, results in chunk_results:
+            modified.update(results["modified_endpoints"])
+        schema_changes = [
+            {name: schema["changes"] for name, schema in results["modified_schemas"].items()}
+            for _, _, results in chunk_results
+        ]
+        return self.assemble_comparison(old_endpoints, new_endpoints, modified, schema_changes)
+    
+    def assemble_comparison(self, old_endpoints: Dict[str, Dict], new_endpoints: Dict[str, Dict],
+                            modified: Dict[str, Dict], schema_changes: List[Dict[str, Dict[str, List]]]) -> Dict:
+        """Comparison results of two indexes whose modified endpoints were diffed piecewise, in serial order.
+        
+        `schema_changes` holds the shared schema changes of each piece; they
+        are merged and summarized again over all modified endpoints.
+        """
+        modified = {endpoint: modified[endpoint] for endpoint in old_endpoints if endpoint in modified}
+        return {
+            "new_endpoints": [
+                {"endpoint": endpoint, "operation_id": info["operation_id"], "summary": info["summary"]}
+                for endpoint, info in new_endpoints.items() if endpoint not in old_endpoints
+            ],
+            "removed_endpoints": [
+                {"endpoint": endpoint, "operation_id": info["operation_id"], "summary": info["summary"]}
+                for endpoint, info in old_endpoints.items() if endpoint not in new_endpoints
+            ],
+            "modified_endpoints": modified,
+            "modified_schemas": self.summarize_schema_changes(self.merge_schema_changes(schema_changes), modified)
+        }
+    
+    def watch_source(self, old_source: SpecSource, path: str, interval: float,
+                     output_format: str = "markdown") -> Iterator[str]:
+        """Re-diff a spec file on disk against a fixed baseline every time it changes.
+        
+        The baseline index stays in memory, and the watched spec (with its
+        overrides) is polled every `interval` seconds and re-indexed
+        incrementally, so each update only flattens and diffs the paths it
+        touched. Yields the full comparison once up front and after each
+        change; JSON is emitted as one document per line.
+        """
+        old_endpoints = self.load_source_index(old_source)
+        if old_endpoints is None:
+            yield "Error: Could not retrieve old OpenAPI spec"
+            return
+        
+        watched = [LocalFileSource(path)]
+        if self.overrides_enabled():
+            watched.append(LocalFileSource(self.overrides_path))
+        index = IncrementalEndpointIndex(self)
+        results = None
+        stamps = None
+        spec_key = None
+        while True:
+            current = [source.stamp() for source in watched]
+            if current != stamps:
+                stamps = current
+                # A fresh source rereads the file; the key tells whether the content really changed
+                located = self.locate_source(LocalFileSource(path))
+                if located is not None and located[0] != spec_key:
+                    started = time.perf_counter()
+                    spec = located[1]()
+                    if spec:
+                        spec_key = located[0]
+                        dirty = index.update(spec)
+                        results = self.recompare_paths(old_endpoints, index.endpoints, results, dirty)
+                        print(f"[{datetime.now():%H:%M:%S}] Re-diffed {len(dirty)} of {len(index.path_hashes)} paths "
+                              f"in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+                        if output_format == "json":
+                            yield json.dumps(results)
+                        else:
+                            yield self.format_changes_markdown(results) or "No API changes."
+            time.sleep(interval)
+    
+    def recompare_paths(self, old_endpoints: Dict[str, Dict], new_endpoints: Dict[str, Dict],
+                        previous: Optional[Dict], paths: List[str]) -> Dict:
+        """Update `previous` comparison results after the endpoints under `paths` changed on the new side."""
+        if previous is None:
+            return self.compare_endpoint_indexes(old_endpoints, new_endpoints)
+        
+        dirty = set(paths)
+        
+        def touched(endpoints: Dict[str, Dict]) -> Dict[str, Dict]:
+            return {endpoint: info for endpoint, info in endpoints.items() if endpoint.split(" ", 1)[1] in dirty}
+        
+        modified = {endpoint: changes for endpoint, changes in previous["modified_endpoints"].items()
+                    if endpoint.split(" ", 1)[1] not in dirty}
+        # A schema still used by an untouched endpoint did not change content, so its earlier changes stand
+        kept = {name for changes in modified.values() for name in changes.get("schemas", {})}
+        fresh = self.compare_endpoint_indexes(touched(old_endpoints), touched(new_endpoints))
+        modified.update(fresh["modified_endpoints"])
+        schema_changes = [
+            {name: schema["changes"] for name, schema in previous["modified_schemas"].items() if name in kept},
+            {name: schema["changes"] for name, schema in fresh["modified_schemas"].items()},
+        ]
+        return self.assemble_comparison(old_endpoints, new_endpoints, modified, schema_changes)
+    
+    def merge_chunk_indexes(self, spec: Dict, chunk_indexes: List[Dict[str, Dict]]) -> Dict[str, Dict]:
+        """Combine per-chunk endpoint indexes in the spec's own path order."""
+        by_path: Dict[str, List[Tuple[str, Dict]]] = {}
+        for index in chunk_indexes:
+            for endpoint, info in index.items():
+                by_path.setdefault(endpoint.split(" ", 1)[1], []).append((endpoint, info))
+        return {
+            endpoint: info
+            for path in spec.get("paths", {})
+            for endpoint, info in by_path.get(path, [])
+        }
+    
+    def compare_asyncapi_sources(self, sources: List[Tuple[str, SpecSource, SpecSource]],
+                                 output_format: str = "markdown") -> str:
+        """Compare AsyncAPI documents, given as (file path, old source, new source) triples."""
+        report = {}
+        for file_path, old_source, new_source in sources:
+            old_channels = self.load_channel_index(old_source)
+            if old_channels is None:
+                return f"Error: Could not retrieve old AsyncAPI spec {file_path}"
+            new_channels = self.load_channel_index(new_source)
+            if new_channels is None:
+                return f"Error: Could not retrieve new AsyncAPI spec {file_path}"
+            report[file_path] = self.compare_channel_indexes(old_channels, new_channels)
+        
+        if output_format == "json":
+            with PROFILE.stage("format"):
+                return json.dumps(report, indent=2)
+        
+        markdown = []
+        for file_path, comparison_results in report.items():
+            changes = self.format_channel_changes_markdown(comparison_results)
+            if changes:
+                markdown.append(f"# {file_path}\n")
+                markdown.append(changes)
+        return "\n".join(markdown) if markdown else "No WebSocket API changes.\n"
+    
+    @PROFILE.timed("format")
+    def schema_impact(self, schema: str, source: SpecSource, asyncapi_sources: List[Tuple[str, SpecSource]],
+                      output_format: str = "markdown") -> str:
+        """List the operations and AsyncAPI channels that reach a component schema.
+        
+        Answered from the reverse usage index of each document, which is
+        cached per spec blob, so repeated queries never re-read the specs.
+        """
+        usage = self.load_schema_usage(source)
+        if usage is None:
+            return "Error: Could not retrieve OpenAPI spec"
+        channel_usage = {}
+        for file_path, asyncapi_source in asyncapi_sources:
+            channel_usage[file_path] = self.load_channel_schema_usage(asyncapi_source)
+            if channel_usage[file_path] is None:
+                return f"Error: Could not retrieve AsyncAPI spec {file_path}"
+        
+        if schema not in usage and not any(schema in channels for channels in channel_usage.values()):
+            known = set(usage).union(*channel_usage.values())
+            suggestions = difflib.get_close_matches(schema, known, n=3)
+            hint = f" (did you mean {', '.join(f'`{name}`' for name in suggestions)}?)" if suggestions else ""
+            return f"Error: No component schema named `{schema}`{hint}"
+        
+        endpoints = usage.get(schema, [])
+        channels = {file_path: channels[schema] for file_path, channels in channel_usage.items() if schema in channels}
+        if output_format == "json":
+            return json.dumps({"schema": schema, "endpoints": endpoints, "channels": channels}, indent=2)
+        
+        lines = [f"## `{schema}`\n"]
+        channel_count = sum(len(names) for names in channels.values())
+        lines.append(f"Used by {len(endpoints)} endpoints and {channel_count} channels.\n")
+        if endpoints:
+            lines.append("### Endpoints\n")
+            lines.extend(f"- `{endpoint}`" for endpoint in endpoints)
+            lines.append("")
+        for file_path, names in channels.items():
+            if names:
+                lines.append(f"### Channels ({file_path})\n")
+                lines.extend(f"- `{name}`" for name in names)
+                lines.append("")
+        return "\n".join(lines)
+    
+    def compare_regions(self, servers: List[Tuple[str, str]],
+                        output_format: str = "markdown") -> Union[str, Iterator[str]]:
+        """Diff the spec served by each regional server against the first, default one.
+        
+        Every `/openapi.json` is fetched concurrently, over one kept-alive
+        connection per host. A region serving byte-identical content to the
+        default is skipped without being parsed; the rest go through the
+        same endpoint and field comparison as any other pair of specs.
+        """
+        if not servers:
+            return "Error: No servers to compare"
+        connections = HttpConnectionPool()
+        sources = [
+            (name, HttpSpecSource(f"{url.rstrip('/')}/openapi.json", self.http_cache_dir, self.offline,
+                                  connections=connections))
+            for name, url in servers
+        ]
+        try:
+            with PROFILE.stage("fetch"):
+                blob_shas = asyncio.run(locate_concurrently([source for _, source in sources]))
+        finally:
+            connections.close()
+        
+        (default_name, default_source), default_sha = sources[0], blob_shas[0]
+        if default_sha is None:
+            return f"Error: Could not retrieve OpenAPI spec from {default_source.describe()}"
+        default_endpoints = None
+        report = {"default": {"name": default_name, "url": default_source.describe(), "blob_sha": default_sha},
+                  "regions": []}
+        for (name, source), blob_sha in zip(sources[1:], blob_shas[1:]):
+            region = {"name": name, "url": source.describe(), "blob_sha": blob_sha, "status": "identical"}
+            report["regions"].append(region)
+            if blob_sha is None:
+                region["status"] = "unavailable"
+            elif blob_sha != default_sha:
+                if default_endpoints is None:
+                    default_endpoints = self.load_source_index(default_source)
+                    if default_endpoints is None:
+                        return f"Error: Could not retrieve OpenAPI spec from {default_source.describe()}"
+                endpoints = self.load_source_index(source)
+                if endpoints is None:
+                    region["status"] = "unavailable"
+                    continue
+                region["status"] = "different"
+                region["changes"] = self.compare_endpoint_indexes(default_endpoints, endpoints)
         
         if output_format == "json":
-            return json.dumps(comparison_results, indent=2)
+            with PROFILE.stage("format"):
+                return json.dumps(report, indent=2)
+        return self.iter_regions_markdown(report)
+    
+    def iter_regions_markdown(self, report: Dict) -> Iterator[str]:
+        """Yield the markdown of a regional drift report line by line."""
+        default = report["default"]
+        yield "# API surface by region\n"
+        yield f"Compared against {default['name']} (`{default['url']}`).\n"
+        markers = {
+            "identical": "✅ identical to the default, skipped",
+            "different": "⚠️ **differs from the default**",
+            "unavailable": "🚨 **could not be fetched**",
+        }
+        for region in report["regions"]:
+            yield f"- {region['name']} (`{region['url']}`) - {markers[region['status']]}"
+        yield ""
+        
+        for region in report["regions"]:
+            if region["status"] == "different":
+                yield f"# {region['name']}\n"
+                if any(region["changes"].values()):
+                    yield from self.iter_changes_markdown(region["changes"])
+                else:
+                    # Content differs only in parts the field-level diff does not cover
+                    yield "No API changes.\n"
+    
+    def compare_timeline(self, date_range: str, every: Optional[timedelta] = None,
+                         output_format: str = "markdown", jobs: Optional[int] = None,
+                         writer: Optional[ChangeRowWriter] = None) -> Union[str, Iterator[str]]:
+        """Diff consecutive revisions of the spec in git over a date range.
+        
+        Without `every`, each commit touching the spec within the range is one
+        step; with it, the range is sampled at that interval. Each distinct
+        blob is loaded once and adjacent pairs are diffed in a process pool.
+        Markdown is yielded interval by interval while later intervals are
+        still being diffed.
+        With a `writer`, each interval's changes are recorded as rows and
+        intervals recorded by an earlier run are skipped.
+        """
+        from_date, _, to_date = date_range.partition("..")
+        to_date = to_date or datetime.now().strftime("%Y-%m-%d")
+        try:
+            start = datetime.strptime(f"{from_date} 23:59:59", "%Y-%m-%d %H:%M:%S")
+            end = datetime.strptime(f"{to_date} 23:59:59", "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return f"Error: Invalid range '{date_range}', expected YYYY-MM-DD..YYYY-MM-DD"
+        if start > end:
+            return f"Error: Invalid range '{date_range}', {from_date} is after {to_date}"
+        print(f"Comparing OpenAPI spec revisions from {from_date} to {to_date}...")
+        
+        # Commits that only touch the overrides change the published surface too
+        timeline_paths = [self.openapi_path] + ([self.overrides_path] if self.overrides_enabled() else [])
+        revisions = self.get_revision_timeline(timeline_paths, end.timestamp())
+        if not revisions:
+            return "Error: Could not list OpenAPI spec revisions"
+        
+        # Pick the revision in effect at each sample point
+        if every:
+            sample_times = []
+            sample = start
+            while sample < end:
+                sample_times.append(sample)
+                sample += every
+            sample_times.append(end)
         else:
-            return self.format_changes_markdown(comparison_results)
+            sample_times = [start] + [
+                datetime.fromtimestamp(timestamp) for timestamp, _ in revisions
+                if start.timestamp() < timestamp <= end.timestamp()
+            ]
+        
+        steps = []
+        for sample in sample_times:
+            in_effect = [commit_hash for timestamp, commit_hash in revisions if timestamp <= sample.timestamp()]
+            if in_effect:
+                steps.append((sample, in_effect[-1]))
+        if not steps:
+            return "Error: No OpenAPI spec revision found before the start of the range"
+        
+        step_commits = sorted({commit_hash for _, commit_hash in steps})
+        spec_shas = self.get_git_blob_shas(step_commits, self.openapi_path)
+        overrides_shas = self.get_git_blob_shas(step_commits, self.overrides_path) if self.apply_overrides else {}
+        # A revision is identified by its spec blob together with the overrides blob in effect
+        blob_shas = {
+            commit_hash: (spec_sha, overrides_shas.get(commit_hash))
+            for commit_hash, spec_sha in spec_shas.items()
+        }
+        intervals = [
+            (old, new) for old, new in zip(steps, steps[1:])
+            if old[1] in blob_shas and new[1] in blob_shas
+        ]
+        
+        # Only intervals where the blob actually changed need a diff, unless an earlier run recorded it
+        changed = list(dict.fromkeys(
+            (blob_shas[old[1]], blob_shas[new[1]]) for old, new in intervals
+            if blob_shas[old[1]] != blob_shas[new[1]]
+        ))
+        already_recorded = {
+            (old, new) for old, new in changed
+            if writer is not None and writer.recorded(overlay_index_key(*old), overlay_index_key(*new))
+        }
+        changed = [pair for pair in changed if pair not in already_recorded]
+        distinct_blobs = sorted({blobs for pair in changed for blobs in pair}, key=lambda blobs: (blobs[0], blobs[1] or ""))
+        
+        cache_dir = str(self.cache.cache_dir) if self.cache else None
+        cache_max_bytes = self.cache.max_bytes if self.cache else None
+        stats = {"intervals": 0, "rows": 0}
+        
+        def report_entries():
+            """Yield report entries in order, each as soon as its diff is done."""
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                loaded = pool.map(_build_index_worker, [(cache_dir, cache_max_bytes, *blobs) for blobs in distinct_blobs])
+                indexes = dict(zip(distinct_blobs, loaded))
+                
+                loadable = [(old, new) for old, new in changed if indexes[old] is not None and indexes[new] is not None]
+                loadable_pairs = set(loadable)
+                # Results arrive in submission order, which is the order intervals first need them
+                compared = zip(loadable, pool.map(_compare_indexes_worker,
+                                                  [(indexes[old], indexes[new]) for old, new in loadable]))
+                interval_results = {}
+                empty_results = {"new_endpoints": [], "removed_endpoints": [], "modified_endpoints": {},
+                                 "modified_schemas": {}}
+                for (old_time, old_commit), (new_time, new_commit) in intervals:
+                    old_blob, new_blob = blob_shas[old_commit], blob_shas[new_commit]
+                    if (old_blob, new_blob) in already_recorded:
+                        continue
+                    if old_blob != new_blob and (old_blob, new_blob) not in interval_results:
+                        if (old_blob, new_blob) in loadable_pairs:
+                            for pair, results in compared:
+                                interval_results[pair] = results
+                                if pair == (old_blob, new_blob):
+                                    break
+                        else:
+                            print(f"Skipping interval {old_commit[:8]}..{new_commit[:8]}: could not load spec")
+                            continue
+                    entry = {
+                        "from": {"date": old_time.strftime("%Y-%m-%d"), "commit": old_commit,
+                                 "blob": old_blob[0], "overrides_blob": old_blob[1]},
+                        "to": {"date": new_time.strftime("%Y-%m-%d"), "commit": new_commit,
+                               "blob": new_blob[0], "overrides_blob": new_blob[1]},
+                        "changes": interval_results.get((old_blob, new_blob), empty_results),
+                    }
+                    stats["intervals"] += 1
+                    
+                    from_key, to_key = overlay_index_key(*old_blob), overlay_index_key(*new_blob)
+                    if writer is not None and old_blob != new_blob and not writer.recorded(from_key, to_key):
+                        interval = {
+                            "from_key": from_key, "to_key": to_key,
+                            "from_revision": old_commit, "to_revision": new_commit,
+                            "from_date": old_time.strftime("%Y-%m-%d"), "to_date": new_time.strftime("%Y-%m-%d"),
+                            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+                        }
+                        stats["rows"] += writer.write(interval, self.change_rows(entry["changes"]))
+                    yield entry
+        
+        if writer is not None:
+            for _ in report_entries():
+                pass
+            skipped = f", skipped {len(already_recorded)} already recorded" if already_recorded else ""
+            return f"Recorded {stats['rows']} changes over {stats['intervals']} intervals{skipped}"
+        if output_format == "json":
+            report = list(report_entries())
+            with PROFILE.stage("format"):
+                return json.dumps(report, indent=2)
+        return self.iter_timeline_markdown(report_entries())
+    
+    def iter_timeline_markdown(self, report) -> Iterator[str]:
+        """Yield the markdown of a timeline report interval by interval, as the report is produced."""
+        empty = True
+        for interval in report:
+            empty = False
+            with PROFILE.stage("format"):
+                old, new = interval["from"], interval["to"]
+                lines = [
+                    f"# {old['date']} → {new['date']}\n",
+                    f"_Revisions `{old['commit'][:8]}` → `{new['commit'][:8]}`_\n",
+                ]
+                if any(interval["changes"].values()):
+                    lines.extend(self.iter_changes_markdown(interval["changes"]))
+                else:
+                    lines.append("No API changes.\n")
+            yield from lines
+        if empty:
+            yield "No API changes.\n"
+
 
 def main():
     parser = argparse.ArgumentParser(description="Generate detailed OpenAPI field-level diff for changelog")
-    parser.add_argument("--from-date", required=True, help="Date to compare from (YYYY-MM-DD)")
-    parser.add_argument("--output-format", choices=["markdown", "json"], default="markdown",
-                       help="Output format (default: markdown)")
-    parser.add_argument("--output-file", help="Output file path (default: stdout)")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--from-date", help="Date to compare from (YYYY-MM-DD)")
+    mode.add_argument("--from", dest="from_source",
+                      help="Spec to compare from: git:REV, file:PATH, an http(s) URL or 'api'")
+    mode.add_argument("--range", dest="date_range", type=parse_date_range,
+                      help="Diff consecutive spec revisions in git between two dates (YYYY-MM-DD..YYYY-MM-DD)")
+    mode.add_argument("--regions", nargs="*", metavar="URL",
+                      help="Instead of diffing revisions, fetch /openapi.json concurrently from every server in "
+                           "openapi-overrides.yml (or from these base URLs, the first being the default) and "
+                           "diff each region against the default")
+    mode.add_argument("--impact", metavar="SCHEMA",
+                      help="Instead of diffing, list the endpoints and AsyncAPI channels in --to that reach "
+                           "this component schema")
+    parser.add_argument("--every", type=parse_interval,
+                       help="With --range, sample the spec at this interval (e.g. 7d) instead of per commit")
+    parser.add_argument("--to", dest="to_source", default="api",
+                       help="Spec to compare to: git:REV, file:PATH, an http(s) URL or 'api' (default: api)")
+    parser.add_argument("--base-url", default=os.environ.get("ELEVENLABS_BASE_URL", DEFAULT_BASE_URL),
+                       help=f"API base URL serving /openapi.json (default: $ELEVENLABS_BASE_URL or {DEFAULT_BASE_URL})")
+    parser.add_argument("--offline", action="store_true",
+                       help="Use the last downloaded copy of HTTP specs instead of the network")
+    parser.add_argument("--jobs", type=parse_jobs,
+                       help="Number of worker processes (default: one per CPU with --range, otherwise diff serially)")
+    parser.add_argument("--output-format", choices=["markdown", "json", "jsonl", "sqlite"], default="markdown",
+                       help="Output format (default: markdown). jsonl and sqlite write one row per change and "
+                            "append to --output-file across runs, skipping revision pairs already recorded")
+    parser.add_argument("--output-file", help="Output file path (default: stdout; required for sqlite)")
+    parser.add_argument("--cache-dir", help="Directory for cached spec indexes (default: ~/.cache/elevenlabs-docs/openapi-diff)")
+    parser.add_argument("--cache-max-mb", type=int, default=256,
+                       help="Maximum size of the spec index cache in MB (default: 256)")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the on-disk spec index cache")
+    parser.add_argument("--no-overrides", action="store_true",
+                       help="Diff the raw OpenAPI spec without merging in fern/apis/api/openapi-overrides.yml")
+    parser.add_argument("--watch", nargs="?", type=float, const=1.0, metavar="SECONDS",
+                       help="Keep running, and re-diff the spec file in --to (default: the working tree copy) "
+                            "against the baseline whenever it or its overrides change, polling every SECONDS "
+                            "(default: 1)")
+    parser.add_argument("--asyncapi", nargs="*", metavar="FILE",
+                       help="Diff these AsyncAPI documents instead of the OpenAPI spec (default: all of them); "
+                            "'api' in --to means the working tree copy")
+    parser.add_argument("--profile", nargs="?", const="", metavar="PATH",
+                       help="Record stage timings and counters to a JSON sidecar "
+                            "(default: OUTPUT_FILE.profile.json, or openapi-diff-profile.json)")
+    parser.add_argument("--profile-cprofile", metavar="PATH",
+                       help="With --profile, also dump cProfile stats to PATH (read with python -m pstats)")
+    parser.add_argument("--profile-tracemalloc", action="store_true",
+                       help="With --profile, also trace Python allocations and report the top sites")
     
     args = parser.parse_args()
+    if args.asyncapi is not None and args.date_range:
+        parser.error("--asyncapi cannot be combined with --range")
+    if args.asyncapi is not None and args.output_format in ("jsonl", "sqlite"):
+        parser.error(f"--asyncapi does not support --output-format {args.output_format}")
+    if args.output_format == "sqlite" and not args.output_file:
+        parser.error("--output-format sqlite requires --output-file")
+    if args.watch is not None:
+        if args.date_range or args.asyncapi is not None:
+            parser.error("--watch cannot be combined with --range or --asyncapi")
+        if args.output_format in ("jsonl", "sqlite"):
+            parser.error(f"--watch does not support --output-format {args.output_format}")
+        if args.to_source.startswith(("git:", "http://", "https://")):
+            parser.error("--watch needs a spec file on disk in --to")
+    if args.regions is not None:
+        if args.output_format in ("jsonl", "sqlite"):
+            parser.error(f"--regions does not support --output-format {args.output_format}")
+        if args.watch is not None or args.asyncapi is not None:
+            parser.error("--regions cannot be combined with --watch or --asyncapi")
+        if len(args.regions) == 1:
+            parser.error("--regions needs a default and at least one other base URL")
+    if args.impact and args.output_format in ("jsonl", "sqlite"):
+        parser.error(f"--impact does not support --output-format {args.output_format}")
+    if args.impact and args.watch is not None:
+        parser.error("--impact cannot be combined with --watch")
     
-    differ = OpenAPIFieldDiff()
-    result = differ.compare_specs(args.from_date, args.output_format)
+    if args.profile is not None or args.profile_cprofile or args.profile_tracemalloc:
+        profile_path = args.profile or (f"{args.output_file}.profile.json" if args.output_file
+                                        else "openapi-diff-profile.json")
+        with profile_run(profile_path, args.profile_cprofile, args.profile_tracemalloc):
+            run(args)
+    else:
+        run(args)
+
+
+@contextmanager
+def profile_run(path: str, cprofile_path: Optional[str] = None, trace_allocations: bool = False):
+    """Enable the stage profile for the enclosed run and write its JSON sidecar afterwards."""
+    import cProfile
+    import tracemalloc
+    
+    PROFILE.enable()
+    if trace_allocations:
+        tracemalloc.start()
+    profiler = cProfile.Profile() if cprofile_path else None
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(cprofile_path)
+        report = PROFILE.report()
+        if trace_allocations:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report["tracemalloc"] = {
+                "peak_kb": peak // 1024,
+                "top": [
+                    {"location": str(stat.traceback[0]), "size_kb": stat.size // 1024, "count": stat.count}
+                    for stat in snapshot.statistics("lineno")[:20]
+                ],
+            }
+        if cprofile_path:
+            report["cprofile"] = cprofile_path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Profile written to {path}", file=sys.stderr)
+
+
+def run(args: argparse.Namespace) -> None:
+    """Run the diff selected on the command line and emit its output."""
+    cache = None if args.no_cache else SpecIndexCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+    http_cache_dir = None if args.no_cache else (cache.cache_dir / "http")
+    differ = OpenAPIFieldDiff(cache, args.base_url, http_cache_dir, args.offline, not args.no_overrides)
+    writer = None
+    if args.output_format == "jsonl":
+        writer = JsonLinesChangeWriter(args.output_file)
+    elif args.output_format == "sqlite":
+        writer = SqliteChangeWriter(args.output_file)
+    
+    # Progress and error messages must not interleave with rows streamed to stdout
+    with redirect_stdout(sys.stderr) if writer is not None else nullcontext():
+        if args.regions is not None:
+            servers = [(url, url) for url in args.regions] or differ.configured_servers()
+            result = differ.compare_regions(servers or [], args.output_format)
+        elif args.impact:
+            # --to names the OpenAPI spec; AsyncAPI documents come from the same git revision, else the working tree
+            asyncapi_to = args.to_source if args.to_source.startswith("git:") else "api"
+            asyncapi_sources = [(file_path, differ.parse_source(asyncapi_to, file_path))
+                                for file_path in args.asyncapi or differ.asyncapi_paths]
+            result = differ.schema_impact(args.impact, differ.parse_source(args.to_source), asyncapi_sources,
+                                          args.output_format)
+        elif args.asyncapi is not None:
+            sources = []
+            for file_path in args.asyncapi or differ.asyncapi_paths:
+                if args.from_source:
+                    old_source = differ.parse_source(args.from_source, file_path)
+                else:
+                    commit_hash = differ.get_git_commit_at_date(file_path, args.from_date)
+                    if not commit_hash:
+                        # The document did not exist yet; a date is never tried as a revision name
+                        print(f"Skipping {file_path}: no revision before {args.from_date}")
+                        continue
+                    old_source = GitRevisionSource(commit_hash, file_path, differ.git)
+                sources.append((file_path, old_source, differ.parse_source(args.to_source, file_path)))
+            if sources:
+                result = differ.compare_asyncapi_sources(sources, args.output_format)
+            else:
+                result = f"Error: No AsyncAPI spec has a revision before {args.from_date}"
+        elif args.watch is not None:
+            watch(differ, args)
+            return
+        elif args.date_range:
+            result = differ.compare_timeline(args.date_range, args.every, args.output_format, args.jobs, writer)
+        elif args.from_source:
+            result = differ.compare_sources(differ.parse_source(args.from_source),
+                                            differ.parse_source(args.to_source), args.output_format, args.jobs, writer)
+        else:
+            result = differ.compare_specs(args.from_date, args.output_format, differ.parse_source(args.to_source),
+                                          args.jobs, writer)
     
-    if args.output_file:
+    if writer is not None:
+        # Rows were already appended; keep stdout clean when they went there
+        writer.close()
+        print(result, file=sys.stderr if not args.output_file else sys.stdout)
+    elif args.output_file:
         Path(args.output_file).parent.mkdir(parents=True, exist_ok=True)
         with open(args.output_file, 'w') as f:
-            f.write(result)
+            write_output(result, f)
         print(f"Results written to {args.output_file}")
     else:
-        print(result)
+        write_output(result, sys.stdout)
+        sys.stdout.write("\n")
+    differ.git.close()
+
+
+def watch(differ: OpenAPIFieldDiff, args: argparse.Namespace) -> None:
+    """Run --watch until interrupted, rewriting --output-file or printing to stdout on every change."""
+    if args.from_source:
+        old_source = differ.parse_source(args.from_source)
+    else:
+        commit_hash = differ.get_git_commit_at_date(differ.openapi_path, args.from_date)
+        if not commit_hash:
+            print(f"Error: No revision of {differ.openapi_path} before {args.from_date}")
+            differ.git.close()
+            return
+        old_source = GitRevisionSource(commit_hash, differ.openapi_path, differ.git)
+    path = differ.openapi_path if args.to_source == "api" else differ.parse_source(args.to_source).path
+    print(f"Watching {path} against {old_source.describe()} (Ctrl-C to stop)", file=sys.stderr)
+    
+    try:
+        for result in differ.watch_source(old_source, path, args.watch, args.output_format):
+            if args.output_file:
+                Path(args.output_file).parent.mkdir(parents=True, exist_ok=True)
+                with open(args.output_file, 'w') as f:
+                    f.write(result + "\n")
+            else:
+                sys.stdout.write(result + "\n")
+                sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        differ.git.close()
+
+
+def write_output(result: Union[str, Iterator[str]], stream) -> None:
+    """Write a result string, or stream result lines as they are produced, joined by newlines."""
+    chunks = [result] if isinstance(result, str) else result
+    for index, chunk in enumerate(chunks):
+        with PROFILE.stage("write"):
+            if index:
+                stream.write("\n")
+            stream.write(chunk)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
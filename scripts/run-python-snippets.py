@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Python Snippet Runner with a Local Mock API
+
+This script runs every snippet under examples/snippets/python/ in parallel,
+each against its own local mock of api.elevenlabs.io, and checks the wall
+time, request count, bytes transferred and peak memory of each run against
+the budgets in examples/snippets/python/snippet-budgets.json. A snippet
+that fails, or starts making redundant calls or buffering more than it
+should, fails the check.
+
+The mock answers every operation in fern/apis/api/openapi.json with a
+response built from the examples in its schemas; audio endpoints return a
+few seconds of silent MP3, streamed in chunks by the streaming endpoints.
+Snippets run unmodified: a sitecustomize module on PYTHONPATH sends their
+httpx requests for api.elevenlabs.io to the mock.
+
+Usage:
+    python3 scripts/run-python-snippets.py [SNIPPET ...] [--jobs N] [--timeout SECONDS] [--output-file FILE]
+
+Examples:
+    python3 scripts/run-python-snippets.py
+    python3 scripts/run-python-snippets.py quickstart_tts.py --output-file snippet-report.json
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SNIPPET_ROOT = REPO_ROOT / "examples" / "snippets" / "python"
+SPEC_PATH = REPO_ROOT / "fern" / "apis" / "api" / "openapi.json"
+BUDGETS_PATH = SNIPPET_ROOT / "snippet-budgets.json"
+
+HTTP_METHODS = ("get", "post", "put", "patch", "delete")
+# Measured per run and compared against the budget of the same name
+METRICS = ("wall_seconds", "requests", "bytes", "max_rss_mb")
+
+# One MPEG-1 Layer III frame of silence at 128 kbps / 44.1 kHz: 417 bytes, about 26 ms of audio
+SILENT_MP3_FRAME = b"\xff\xfb\x90\x64" + bytes(413)
+AUDIO_SECONDS = 2
+STREAM_CHUNK_SIZE = 4096
+STREAM_CHUNK_DELAY = 0.01
+
+SITECUSTOMIZE = '''\
+# Written by scripts/run-python-snippets.py to send ElevenLabs API requests to the local mock
+import os
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+if httpx is not None and os.environ.get("ELEVENLABS_MOCK_URL"):
+    _mock = httpx.URL(os.environ["ELEVENLABS_MOCK_URL"])
+
+    def _redirect(send):
+        def wrapper(self, request, *args, **kwargs):
+            if request.url.host.endswith("elevenlabs.io"):
+                request.url = request.url.copy_with(scheme=_mock.scheme, host=_mock.host, port=_mock.port)
+            return send(self, request, *args, **kwargs)
+        return wrapper
+
+    httpx.Client.send = _redirect(httpx.Client.send)
+    httpx.AsyncClient.send = _redirect(httpx.AsyncClient.send)
+'''
+
+
+class MockApi:
+    """Canned responses for every operation of an OpenAPI spec, built from its schema examples."""
+
+    def __init__(self, spec: Dict):
+        self.spec = spec
+        self.routes: List[Tuple[str, re.Pattern, Dict]] = []
+        for path, item in spec.get("paths", {}).items():
+            pattern = re.compile("^" + re.sub(r"\\\{[^/]+?\\\}", "[^/]+", re.escape(path)) + "/?$")
+            for method, operation in item.items():
+                if method in HTTP_METHODS:
+                    self.routes.append((method.upper(), pattern, operation))
+        # Literal paths win over templated ones, e.g. /v1/voices/settings/default over /v1/voices/{voice_id}
+        self.routes.sort(key=lambda route: route[1].pattern.count("[^/]+"))
+        self.responses: Dict[int, Tuple[int, str, bytes]] = {}
+        self.lock = threading.Lock()
+
+    def match(self, method: str, path: str) -> Optional[Dict]:
+        """The operation serving a request, if any."""
+        for route_method, pattern, operation in self.routes:
+            if route_method == method and pattern.match(path):
+                return operation
+        return None
+
+    def response(self, operation: Dict) -> Tuple[int, str, bytes]:
+        """Status, content type and body of the first successful response of an operation, built once."""
+        with self.lock:
+            if id(operation) not in self.responses:
+                self.responses[id(operation)] = self.build_response(operation)
+            return self.responses[id(operation)]
+
+    def build_response(self, operation: Dict) -> Tuple[int, str, bytes]:
+        responses = operation.get("responses", {})
+        status = next((code for code in responses if code.startswith("2")), "200")
+        content = self.resolve(responses.get(status, {})).get("content", {})
+        if not content:
+            return int(status), "application/json", b"" if status == "204" else b"{}"
+
+        content_type, media = next(iter(content.items()))
+        if content_type.startswith("audio/"):
+            frames = AUDIO_SECONDS * 44100 // 1152
+            return int(status), "audio/mpeg", SILENT_MP3_FRAME * frames
+        if content_type == "application/json":
+            if "example" in media:
+                body = media["example"]
+            elif media.get("examples"):
+                body = self.resolve(next(iter(media["examples"].values()))).get("value")
+            else:
+                body = self.example(media.get("schema", {}))
+            return int(status), content_type, json.dumps(body).encode()
+        if content_type.startswith("text/"):
+            return int(status), content_type, b"string"
+        return int(status), content_type, b""
+
+    def resolve(self, node: Any) -> Dict:
+        """Follow a local `$ref` to the node it points at."""
+        while isinstance(node, dict) and isinstance(node.get("$ref"), str) and node["$ref"].startswith("#/"):
+            target: Any = self.spec
+            for part in node["$ref"][2:].split("/"):
+                target = target.get(part.replace("~1", "/").replace("~0", "~"), {}) if isinstance(target, dict) else {}
+            node = target
+        return node if isinstance(node, dict) else {}
+
+    def example(self, schema: Any, refs: Tuple[str, ...] = ()) -> Any:
+        """An example value for a schema: its own example, default or first enum value, or one built from its type."""
+        if not isinstance(schema, dict):
+            return None
+        ref = schema.get("$ref")
+        if isinstance(ref, str):
+            # Recursive schemas end in null rather than expanding forever
+            return None if ref in refs or len(refs) > 12 else self.example(self.resolve(schema), refs + (ref,))
+
+        if "example" in schema:
+            return schema["example"]
+        if isinstance(schema.get("examples"), list) and schema["examples"]:
+            return schema["examples"][0]
+        for key in ("default", "const"):
+            if key in schema:
+                return schema[key]
+        if schema.get("enum"):
+            return schema["enum"][0]
+
+        if "allOf" in schema:
+            merged: Dict[str, Any] = {}
+            for part in schema["allOf"]:
+                value = self.example(part, refs)
+                if isinstance(value, dict):
+                    merged.update(value)
+            return merged
+        for key in ("anyOf", "oneOf"):
+            options = [option for option in schema.get(key, []) if self.resolve(option).get("type") != "null"]
+            if options:
+                return self.example(options[0], refs)
+
+        schema_type = schema.get("type")
+        if isinstance(schema_type, list):
+            schema_type = next((t for t in schema_type if t != "null"), None)
+        if schema_type == "object" or "properties" in schema:
+            return {name: self.example(prop, refs) for name, prop in schema.get("properties", {}).items()}
+        if schema_type == "array":
+            return [self.example(schema.get("items", {}), refs)]
+        if schema_type == "string":
+            return "2024-01-01T00:00:00Z" if schema.get("format") == "date-time" else "string"
+        if schema_type == "integer":
+            return 0
+        if schema_type == "number":
+            return 0.0
+        if schema_type == "boolean":
+            return False
+        return None
+
+
+def mock_handler(api: MockApi, stats: Dict[str, Any]):
+    """A request handler class serving `api` and counting traffic into `stats`."""
+
+    class Handler(BaseHTTPRequestHandler):
+        # Keep connections open so connection reuse shows up in the measurements
+        protocol_version = "HTTP/1.1"
+
+        def handle_request(self) -> None:
+            received = self.read_body()
+            path = self.path.split("?", 1)[0]
+            operation = api.match(self.command, path)
+            if operation is None:
+                status, content_type, body = 404, "application/json", json.dumps({"detail": "Not Found"}).encode()
+            else:
+                status, content_type, body = api.response(operation)
+            with stats["lock"]:
+                stats["requests"] += 1
+                stats["bytes"] += received + len(body)
+                if operation is None:
+                    stats["unmatched"].append(f"{self.command} {path}")
+
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            if operation is not None and path.rstrip("/").endswith("/stream"):
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for start in range(0, len(body), STREAM_CHUNK_SIZE):
+                    chunk = body[start:start + STREAM_CHUNK_SIZE]
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    self.wfile.flush()
+                    time.sleep(STREAM_CHUNK_DELAY)
+                self.wfile.write(b"0\r\n\r\n")
+            else:
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        def read_body(self) -> int:
+            """Consume the request body and return its size."""
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                size = 0
+                while True:
+                    length = int(self.rfile.readline().split(b";", 1)[0], 16)
+                    self.rfile.read(length + 2)
+                    size += length
+                    if length == 0:
+                        return size
+            length = int(self.headers.get("Content-Length") or 0)
+            self.rfile.read(length)
+            return length
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_request
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    return Handler
+
+
+def run_snippet(snippet: Path, api: MockApi, site_dir: str, timeout: float) -> Dict[str, Any]:
+    """Run one snippet against its own mock server and measure it."""
+    stats: Dict[str, Any] = {"lock": threading.Lock(), "requests": 0, "bytes": 0, "unmatched": []}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), mock_handler(api, stats))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    mock_url = f"http://127.0.0.1:{server.server_address[1]}"
+    env = {
+        **os.environ,
+        "ELEVENLABS_API_KEY": "mock-api-key",
+        "ELEVENLABS_BASE_URL": mock_url,
+        "ELEVENLABS_MOCK_URL": mock_url,
+        "PYTHONPATH": os.pathsep.join(filter(None, [site_dir, os.environ.get("PYTHONPATH")])),
+        # Let play() run ffplay without a sound card
+        "SDL_AUDIODRIVER": "dummy",
+    }
+
+    try:
+        # Snippets write their output files to the working directory
+        with tempfile.TemporaryDirectory() as cwd:
+            started = time.perf_counter()
+            process = subprocess.Popen([sys.executable, str(snippet)], cwd=cwd, env=env,
+                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            timed_out = threading.Event()
+
+            def kill() -> None:
+                # Only a kill from the timer counts as a timeout, not a crash by signal
+                timed_out.set()
+                process.kill()
+
+            timer = threading.Timer(timeout, kill)
+            timer.start()
+            output = process.stdout.read().decode(errors="replace")
+            # wait4 rather than wait, for the peak memory of this child alone
+            _, status, rusage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            timer.cancel()
+            wall_seconds = time.perf_counter() - started
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return {
+        # Snippets outside the snippet root are budgeted by file name
+        "snippet": str(snippet.resolve().relative_to(SNIPPET_ROOT)) if SNIPPET_ROOT in snippet.resolve().parents
+        else snippet.name,
+        "exit_code": process.returncode,
+        "timed_out": timed_out.is_set(),
+        "wall_seconds": round(wall_seconds, 3),
+        "requests": stats["requests"],
+        "bytes": stats["bytes"],
+        # ru_maxrss is in kilobytes on Linux
+        "max_rss_mb": round(rusage.ru_maxrss / 1024, 1),
+        "unmatched_requests": stats["unmatched"],
+        "output": output,
+    }
+
+
+def check_budget(result: Dict[str, Any], budget: Dict[str, float]) -> List[str]:
+    """Describe every way a run failed or went over its budget."""
+    problems = []
+    if result["timed_out"]:
+        problems.append("timed out")
+    elif result["exit_code"] != 0:
+        problems.append(f"exited with status {result['exit_code']}")
+    for path in result["unmatched_requests"]:
+        problems.append(f"requested {path}, which is not in the OpenAPI spec")
+    for metric in METRICS:
+        if metric in budget and result[metric] > budget[metric]:
+            problems.append(f"{metric} {result[metric]} over budget {budget[metric]}")
+    return problems
+
+
+def discover_snippets(names: List[str]) -> List[Path]:
+    """The snippets named on the command line, or every Python snippet."""
+    if not names:
+        return sorted(SNIPPET_ROOT.glob("**/*.py"))
+    return [Path(name) if Path(name).exists() else SNIPPET_ROOT / name for name in names]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Python snippets against a local mock API and check their budgets")
+    parser.add_argument("snippets", nargs="*", metavar="SNIPPET",
+                       help="Snippets to run, as paths or relative to examples/snippets/python (default: all)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                       help="Number of snippets to run at once (default: one per CPU)")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds before a snippet is killed (default: 120)")
+    parser.add_argument("--spec", default=str(SPEC_PATH), help="OpenAPI spec the mock serves")
+    parser.add_argument("--budgets", default=str(BUDGETS_PATH), help="Budgets file (default: %(default)s)")
+    parser.add_argument("--output-file", help="Write the measurements of every run to this JSON file")
+
+    args = parser.parse_args()
+
+    with open(args.spec) as f:
+        api = MockApi(json.load(f))
+    with open(args.budgets) as f:
+        budgets = json.load(f)
+    snippets = discover_snippets(args.snippets)
+
+    with tempfile.TemporaryDirectory() as site_dir:
+        Path(site_dir, "sitecustomize.py").write_text(SITECUSTOMIZE)
+        with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+            results = list(pool.map(lambda snippet: run_snippet(snippet, api, site_dir, args.timeout), snippets))
+
+    failed = 0
+    for result in results:
+        budget = {**budgets.get("default", {}), **budgets.get(result["snippet"], {})}
+        result["budget"] = budget
+        result["problems"] = check_budget(result, budget)
+        print(f"{'FAIL' if result['problems'] else 'ok  '} {result['snippet']}: {result['wall_seconds']:.2f}s, "
+              f"{result['requests']} requests, {result['bytes'] / 1024:.1f} KiB, {result['max_rss_mb']} MiB peak")
+        for problem in result["problems"]:
+            print(f"    - {problem}")
+        if result["problems"]:
+            failed += 1
+            print("\n".join(f"    | {line}" for line in result["output"].rstrip().splitlines()[-20:]))
+
+    if args.output_file:
+        Path(args.output_file).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output_file, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output_file}")
+
+    print(f"{len(results) - failed} of {len(results)} snippets passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()